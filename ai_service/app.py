@@ -1,34 +1,70 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import joblib
 import numpy as np
-import pandas as pd
 import os
-import requests
+import time
+import atexit
 import json
 from datetime import datetime, timedelta
 from dateutil.parser import parse as parse_date
-from pymongo import MongoClient
 from dotenv import dotenv_values
-from bson import ObjectId
+from availability import AvailabilityIndex
+from context_cache import HotelContextCache
+from response_cache import ResponseCache
+from llm_client import LLMClient
+from forecast import ForecastTable
+from room_table import RoomTable
+from occupancy import OccupancyCalendar, month_bounds
+from pricing import PricingEngine, baseline_monthly_bookings, suggestion_score, suggestion
+from model_registry import ModelRegistry
+from chat_log_shipper import ChatLogShipper, MongoSink, HttpSink
+from chat_sessions import ChatSessionStore
+import intent_router
+import metrics
+from metrics import MONGO_QUERY_SECONDS
 
 # Initialize the Flask application
 app = Flask(__name__) # CORRECTED: Changed __app__ to __name__
 CORS(app)
 
-# --- Database Connection ---
-try:
-    config = dotenv_values(os.path.join(os.path.dirname(__file__), '..', 'hotel-management-app', '.env'))
-    MONGO_URI = config.get('MONGO_URI')
-    client = MongoClient(MONGO_URI)
-    db = client.get_database()
-    bookings_collection = db.bookings
-    rooms_collection = db.rooms
-    print("MongoDB connection successful.")
-except Exception as e:
-    print(f"ERROR: Could not connect to MongoDB. {e}")
-    bookings_collection = None
-    rooms_collection = None
+# --- Metrics ---
+# Exposed in Prometheus text format on /metrics.
+REQUEST_SECONDS = metrics.histogram("ai_service_request_seconds", "Request latency by endpoint (streamed replies: until the first byte).", ["endpoint", "method"])
+REQUESTS_TOTAL = metrics.counter("ai_service_requests_total", "Requests by endpoint and status code.", ["endpoint", "status"])
+CHAT_STAGE_SECONDS = metrics.histogram("ai_service_chat_stage_seconds", "Time spent in each stage of /chat.", ["stage"])
+CHAT_INTENTS = metrics.counter("ai_service_chat_intents_total", "Detected /chat intents by the router that resolved them.", ["intent", "source"])
+INTENT_PARSE_FALLBACKS = metrics.counter("ai_service_intent_parse_fallbacks_total", "Intent LLM replies that were not valid JSON.")
+RESPONSE_CACHE_LOOKUPS = metrics.counter("ai_service_response_cache_lookups_total", "Concierge reply cache lookups.", ["result"])
+CHAT_HISTORY_TOKENS = metrics.histogram("ai_service_chat_history_tokens", "Estimated history tokens (summary + recent turns) per generation prompt.", buckets=(0, 50, 100, 200, 400, 800, 1200, 1600, 2400, 3200))
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method)
+        REQUESTS_TOTAL.inc(endpoint, str(response.status_code))
+    return response
+
+config = dotenv_values(os.path.join(os.path.dirname(__file__), '..', 'hotel-management-app', '.env'))
+
+def _setting(name, default=None):
+    """Process environment first, then the Node app's .env file."""
+    return os.environ.get(name) or config.get(name) or default
+
+# --- Per-Process Services ---
+# Mongo pools, the availability index, the LLM session and the background threads hold sockets
+# and threads that do not survive fork(), so start_services() creates them in the process that
+# serves requests: at import for the dev server, and after the fork in each serve.py worker.
+client = db = bookings_collection = rooms_collection = None
+availability_index = occupancy_calendar = pricing_engine = None
+llm_client = chat_log_shipper = None
+services_started = False
+draining = False
 
 # --- Static Hotel Information ---
 HOTEL_INFO = {
@@ -40,43 +76,160 @@ HOTEL_INFO = {
 }
 
 # --- Load Local Prediction Model ---
-try:
-    prediction_model = joblib.load('booking_model.pkl')
+# Versions published by train.py are picked up by a background watcher and swapped in without a restart.
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+model_registry = ModelRegistry(
+    registry_dir=_setting('MODEL_REGISTRY_DIR', os.path.join(SERVICE_DIR, 'models')),
+    legacy_path=os.path.join(SERVICE_DIR, 'booking_model.pkl'),
+    poll_interval=float(_setting('MODEL_POLL_INTERVAL', 5)),
+)
+# Loaded at import so serve.py workers share the model's memory copy-on-write; the watcher starts per worker.
+if model_registry.load():
     print("Local prediction model loaded successfully.")
-except FileNotFoundError:
-    prediction_model = None
-    print("ERROR: booking_model.pkl not found.")
+else:
+    print(f"ERROR: {model_registry.last_error}")
+
+def _forecast():
+    """Forecast table of the live model; read once per request so a swap mid-request is harmless."""
+    active = model_registry.active
+    return active.forecast if active is not None else None
 
 # --- Helper Functions for AI Agent ---
 
+def _fetch_context_rooms():
+    if availability_index is not None and availability_index.ready:
+        return availability_index.rooms()
+    with MONGO_QUERY_SECONDS.time("rooms_find"):
+        return list(rooms_collection.find({}, {"_id": 0, "type": 1, "price": 1, "roomNumber": 1, "isAvailable": 1}))
+
+def _rooms_version():
+    return availability_index.rooms_version if availability_index is not None and availability_index.ready else None
+
+context_cache = HotelContextCache(_fetch_context_rooms, HOTEL_INFO, version_fn=_rooms_version)
+
+response_similarity = _setting('RESPONSE_CACHE_SIMILARITY')
+response_cache = ResponseCache(
+    max_entries=int(_setting('RESPONSE_CACHE_SIZE', 1024)),
+    max_age=float(_setting('RESPONSE_CACHE_MAX_AGE', 600)),
+    similarity_threshold=float(response_similarity) if response_similarity else None,
+)
+
+chat_sessions = ChatSessionStore(
+    max_sessions=int(_setting('CHAT_SESSION_MAX', 10000)),
+    ttl=float(_setting('CHAT_SESSION_TTL', 1800)),
+    token_budget=int(_setting('CHAT_HISTORY_TOKENS', 1200)),
+    summary_budget=int(_setting('CHAT_SUMMARY_TOKENS', 300)),
+)
+
+def start_services():
+    """Creates the Mongo pool and starts the index, LLM client, chat-log shipper and model watcher for this process.
+    Nothing here waits on MongoDB: the pool connects on first use and the index loads in its background
+    thread, with /ready reporting 503 until it has."""
+    global client, db, bookings_collection, rooms_collection, availability_index, occupancy_calendar, pricing_engine
+    global llm_client, chat_log_shipper, services_started
+    if services_started: return
+
+    # --- Database Connection ---
+    from pymongo import MongoClient
+    try:
+        client = MongoClient(_setting('MONGO_URI'), maxPoolSize=int(_setting('MONGO_POOL_SIZE', 20)), connect=False)
+        db = client.get_database()
+        bookings_collection = db.bookings
+        rooms_collection = db.rooms
+        print("MongoDB client created.")
+    except Exception as e:
+        print(f"ERROR: Could not connect to MongoDB. {e}")
+
+    # --- In-Memory Availability Index ---
+    if bookings_collection is not None and rooms_collection is not None:
+        availability_index = AvailabilityIndex(bookings_collection, rooms_collection)
+        # Rooms x days occupancy matrix; subscribed before the first load so it never misses a booking event.
+        occupancy_calendar = OccupancyCalendar(availability_index)
+        availability_index.subscribe(response_cache.invalidate)
+        pricing_engine = PricingEngine(occupancy_calendar, availability_index, lambda: model_registry.active)
+        availability_index.start()
+
+    # --- Shared LLM Client ---
+    llm_client = LLMClient(
+        api_url=_setting('LLM_API_URL', "https://models.github.ai/inference/chat/completions"),
+        model=_setting('LLM_MODEL', "microsoft/Phi-3-mini-4k-instruct"),
+        max_concurrency=int(_setting('LLM_MAX_CONCURRENCY', 8)),
+        read_timeout=float(_setting('LLM_TIMEOUT', 30)),
+        call_timeout=float(_setting('LLM_CALL_TIMEOUT', 0)) or None,  # Default: connect + read timeout
+        max_retries=int(_setting('LLM_MAX_RETRIES', 3)),
+    )
+
+    # --- Background Chat-Log Shipper ---
+    if _setting('CHAT_LOG_SINK', 'mongo') == 'mongo' and db is not None:
+        chat_log_sink = MongoSink(db.chatlogs)
+    else:
+        chat_log_sink = HttpSink(_setting('CHAT_LOG_URL', "http://localhost:3000/api/log-chat/batch"))
+    chat_log_shipper = ChatLogShipper(
+        chat_log_sink,
+        max_queue=int(_setting('CHAT_LOG_QUEUE_SIZE', 10000)),
+        # "{pid}" keeps forked workers from sharing (and racing on) one spill file.
+        spill_path=_setting('CHAT_LOG_SPILL_PATH', os.path.join(SERVICE_DIR, 'chat_log_spill.{pid}.jsonl')),
+    )
+    chat_log_shipper.start()
+    atexit.register(chat_log_shipper.close)
+
+    # Set by serve.py so /metrics sums every worker, not just the one that answers the scrape.
+    if _setting('METRICS_MULTIPROC_DIR'):
+        metrics.share_across_processes(_setting('METRICS_MULTIPROC_DIR'), float(_setting('METRICS_SNAPSHOT_INTERVAL', 5)))
+
+    model_registry.start()
+    services_started = True
+
+def begin_drain():
+    """Marks the process as not ready so load balancers stop routing to it while in-flight requests finish."""
+    global draining
+    draining = True
+
 def _get_general_context():
-    """Retrieves general room data and static info from DB to provide context to the AI."""
+    """Retrieves general room data and static info to provide context to the AI, served from the context cache."""
     if rooms_collection is None: return "Database not connected."
+    return context_cache.get()
+
+def _check_specific_availability(room_number: str = None, check_in_date: str = None, check_out_date: str = None):
+    """Precise tool to check availability for a specific room and date range, answered from the in-memory index."""
+    if availability_index is None or not availability_index.ready:
+        return _check_availability_in_db(room_number, check_in_date, check_out_date)
+
+    try:
+        check_in = parse_date(check_in_date) if check_in_date else None
+        check_out = parse_date(check_out_date) if check_out_date else None
+        if check_in and check_out and check_in >= check_out: return "The check-in date must be before the check-out date."
 
-    rooms = list(rooms_collection.find({}, {"_id": 0, "type": 1, "price": 1, "amenities": 1, "description": 1, "roomNumber": 1, "isAvailable": 1}))
-    if not rooms: return "No room information available."
+        if not room_number:
+            if not check_in or not check_out:
+                return "The user did not specify a room number, so I cannot check the schedule."
+            return _describe_free_rooms(check_in, check_out)
 
-    context = "Here is the current, real-time information about our hotel:\n"
-    context += f"- General Info: Check-in is at {HOTEL_INFO['check_in_time']}, Check-out is at {HOTEL_INFO['check_out_time']}.\n"
-    context += f"- General Amenities: {', '.join(HOTEL_INFO['amenities'])}.\n\n"
+        target_room = availability_index.room_by_number(room_number)
+        if not target_room: return f"I'm sorry, I could not find a room with the number '{room_number}'."
 
-    context += "=== Room Details & Live Status ===\n"
-    for room in rooms:
-        status = "available for immediate booking" if room.get('isAvailable') else "currently occupied"
-        context += f"- Room {room.get('roomNumber')} is a {room.get('type')} that costs ${room.get('price')} per night. Its current status is {status}.\n"
+        if not check_in or not check_out:
+            status = "available for booking" if target_room.get('isAvailable') else "currently occupied or unavailable"
+            return f"Room {room_number} is {status} right now."
 
-    prices = [r['price'] for r in rooms if 'price' in r]
-    if prices: context += f"\nThe most expensive room costs ${max(prices)} and the cheapest costs ${min(prices)}.\n"
-    return context
+        if not availability_index.is_free(target_room['_id'], check_in, check_out):
+            return f"Unfortunately, Room {room_number} is **booked** from {check_in.strftime('%B %d, %Y')} to {check_out.strftime('%B %d, %Y')}."
+        else:
+            return f"Good news! Room {room_number} is **available** for booking from {check_in.strftime('%B %d, %Y')} to {check_out.strftime('%B %d, %Y')}."
 
-def _check_specific_availability(room_number: str = None, check_in_date: str = None, check_out_date: str = None):
-    """Precise tool to check availability for a specific room and date range."""
+    except Exception as e:
+        print(f"DB Specific Check Error: {e}")
+        return "I encountered an error while checking the booking schedule."
+
+def _check_availability_in_db(room_number, check_in_date, check_out_date):
+    """Direct MongoDB check, used while the availability index is still loading."""
     if bookings_collection is None or rooms_collection is None:
         return "Database connection is not available."
 
     try:
         if not room_number: return "The user did not specify a room number, so I cannot check the schedule."
-        target_room = rooms_collection.find_one({"roomNumber": room_number})
+        with MONGO_QUERY_SECONDS.time("room_find_one"):
+            target_room = rooms_collection.find_one({"roomNumber": room_number})
 
         if not target_room: return f"I'm sorry, I could not find a room with the number '{room_number}'."
 
@@ -88,15 +241,13 @@ def _check_specific_availability(room_number: str = None, check_in_date: str = N
         check_out = parse_date(check_out_date)
         if check_in >= check_out: return "The check-in date must be before the check-out date."
 
-        overlapping_booking = bookings_collection.find_one({
-            "room": target_room['_id'],
-            "status": 'Active',
-            "$or": [
-                {"checkInDate": {"$lt": check_out, "$gte": check_in}},
-                {"checkOutDate": {"$gt": check_in, "$lte": check_out}},
-                {"checkInDate": {"$lte": check_in}, "checkOutDate": {"$gte": check_out}}
-            ]
-        })
+        with MONGO_QUERY_SECONDS.time("booking_find_one"):
+            overlapping_booking = bookings_collection.find_one({
+                "room": target_room['_id'],
+                "status": 'Active',
+                "checkInDate": {"$lt": check_out},
+                "checkOutDate": {"$gt": check_in}
+            })
 
         if overlapping_booking:
             return f"Unfortunately, Room {room_number} is **booked** from {check_in.strftime('%B %d, %Y')} to {check_out.strftime('%B %d, %Y')}."
@@ -107,23 +258,32 @@ def _check_specific_availability(room_number: str = None, check_in_date: str = N
         print(f"DB Specific Check Error: {e}")
         return "I encountered an error while checking the booking schedule."
 
+FREE_ROOMS_PER_TYPE = 3  # Rooms named per type; the rest are summarised so the tool result fits the LLM context.
+
+def _describe_free_rooms(check_in, check_out):
+    """Bulk variant used when the guest gives dates but no room number: counts and the cheapest rooms per type."""
+    free = availability_index.free_rooms(check_in, check_out)
+    dates = f"from {check_in.strftime('%B %d, %Y')} to {check_out.strftime('%B %d, %Y')}"
+    if not free: return f"Unfortunately, no rooms are available {dates}."
+    by_type = {}
+    for room in free:
+        by_type.setdefault(room.get('type') or 'Other', []).append(room)
+    parts = []
+    for room_type, rooms in sorted(by_type.items()):
+        rooms.sort(key=lambda r: (float(r.get('price') or 0), str(r.get('roomNumber'))))
+        named = ", ".join(f"Room {r.get('roomNumber')} (${r.get('price')}/night)" for r in rooms[:FREE_ROOMS_PER_TYPE])
+        more = f" and {len(rooms) - FREE_ROOMS_PER_TYPE} more" if len(rooms) > FREE_ROOMS_PER_TYPE else ""
+        parts.append(f"{len(rooms)} {room_type} room{'s' if len(rooms) != 1 else ''}, cheapest: {named}{more}")
+    return f"{len(free)} rooms are **available** {dates}: " + "; ".join(parts) + "."
+
 def _log_chat_interaction(user_input, ai_response, intent="general"):
-    try:
-        requests.post("http://localhost:3000/api/log-chat", json={"userInput": user_input, "aiResponse": ai_response, "intent": intent}, timeout=2)
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to log chat interaction: {e}")
+    """Queues the interaction for the background shipper; never blocks the request."""
+    with CHAT_STAGE_SECONDS.time("log"):
+        chat_log_shipper.submit(user_input, ai_response, intent)
 
 # --- AI Concierge Chat Endpoint (Full Agent Implementation with Error Handling) ---
-@app.route('/chat', methods=['POST'])
-def chat_concierge():
-    json_data = request.get_json()
-    user_message, token, history = json_data.get('message'), json_data.get('token'), json_data.get('history', [])
-    if not user_message or not token: return jsonify({"error": "Missing message or token"}), 400
-
-    api_url = "https://models.github.ai/inference/chat/completions"
-    model_to_use = "microsoft/Phi-3-mini-4k-instruct"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-
+def _detect_intent_with_llm(token, user_message):
+    """Fallback intent router for messages the rule-based router could not resolve."""
     intent_detection_prompt = f"""You are an intent router. Analyze the user's latest message. Respond ONLY with a JSON object.
     Determine the intent: 'specific_availability' or 'general_question'.
     For 'specific_availability', you MUST extract 'room_number' (as a string), 'check_in_date' (YYYY-MM-DD), and 'check_out_date' (YYYY-MM-DD). If any part is missing, return null for that part.
@@ -132,67 +292,187 @@ def chat_concierge():
     User's latest message: "{user_message}"
     Response:
     """
+    ai_response_text = llm_client.complete(token, intent_detection_prompt, temperature=0.0, max_tokens=200)
 
     try:
-        payload = {"model": model_to_use, "messages": [{"role": "user", "content": intent_detection_prompt}], "temperature": 0.0, "max_tokens": 200}
+        parsed_json = json.loads(ai_response_text)
+        # The model sometimes puts the slots at the top level instead of under "parameters".
+        params = parsed_json.get("parameters") or parsed_json
+        return parsed_json.get("intent") or "general_question", params if isinstance(params, dict) else {}
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        # If the AI fails to produce JSON, we fall back to general context
+        INTENT_PARSE_FALLBACKS.inc()
+        return "general_question", {}
 
-        response = requests.post(api_url, headers=headers, json=payload)
-        if response.status_code != 200:
-            raise Exception(f"Intent detection API failed with status {response.status_code}: {response.text}")
-
-        ai_response_text = response.json()['choices'][0]['message']['content']
+@app.route('/chat', methods=['POST'])
+def chat_concierge():
+    json_data = request.get_json()
+    user_message, token = json_data.get('message'), json_data.get('token')
+    stream = bool(json_data.get('stream'))
+    if not user_message or not token: return jsonify({"error": "Missing message or token"}), 400
 
-        intent = "general_question"
-        tool_result = ""
+    # History is kept server-side per session_id. The client's recent `history` seeds the session when
+    # this worker does not know the id (another serve.py worker created it, or it expired); clients
+    # that send `history` without a session_id get it compacted to the same budget, without a stored session.
+    # Ids are ours (secrets.token_urlsafe), so anything that is not a short string is treated as no id.
+    session_id = json_data.get('session_id')
+    if not isinstance(session_id, str) or len(session_id) > 64: session_id = None
+    history = json_data.get('history')
+    history = [t for t in history if isinstance(t, dict)] if isinstance(history, list) else []
+    if history and history[-1].get('role') == 'user' and history[-1].get('content') == user_message:
+        history = history[:-1]  # Older widgets append the current message before sending.
+    if history and not session_id:
+        session, restarted = chat_sessions.transient(history), False
+    else:
+        session, restarted = chat_sessions.get_or_create(session_id)
+        if history and session.is_empty: chat_sessions.seed(session, history)
+    session_fields = {'session_id': session.id, 'session_restarted': restarted} if session.id else {}
 
-        try:
-            parsed_json = json.loads(ai_response_text)
-            intent = parsed_json.get("intent")
+    try:
+        # Clear-cut messages are routed locally; only ambiguous ones pay for the intent LLM call.
+        with CHAT_STAGE_SECONDS.time("route"):
+            routed = intent_router.route(user_message)
+        if routed is not None:
+            intent, params = routed
+        else:
+            with CHAT_STAGE_SECONDS.time("intent_llm"):
+                intent, params = _detect_intent_with_llm(token, user_message)
+        CHAT_INTENTS.inc(intent, "router" if routed is not None else "llm")
 
-            if intent == "specific_availability":
-                params = parsed_json.get("parameters", {})
+        if intent == "specific_availability":
+            with CHAT_STAGE_SECONDS.time("tool_availability"):
                 tool_result = _check_specific_availability(
                     room_number=params.get("room_number"),
                     check_in_date=params.get("check_in_date"),
                     check_out_date=params.get("check_out_date")
                 )
-            else: # general_question
+        else: # general_question
+            with CHAT_STAGE_SECONDS.time("tool_context"):
                 tool_result = _get_general_context()
-        except (json.JSONDecodeError, TypeError):
-             # If the AI fails to produce JSON, we fall back to general context
-            tool_result = _get_general_context()
 
         # Final step: Generate a natural language response based on the tool result and history
+        summary, recent_turns = session.history()
+        CHAT_HISTORY_TOKENS.observe(session.prompt_tokens)
+        earlier = f"\n        Summary of the earlier conversation: {summary}" if summary else ""
         response_generation_prompt = f"""You are 'Al', a helpful AI hotel concierge.
         A user asked: "{user_message}"
-        You have used a tool and retrieved the following information: "{tool_result}"
-        The conversation history is: {json.dumps(history)}
+        You have used a tool and retrieved the following information: "{tool_result}"{earlier}
+        The conversation history is: {json.dumps(recent_turns)}
 
         Based ONLY on the retrieved information and history, provide a direct, friendly, and conversational answer to the user's LATEST message.
         """
 
-        final_payload = {"model": model_to_use, "messages": [{"role": "user", "content": response_generation_prompt}], "temperature": 0.7, "max_tokens": 250}
-        final_response = requests.post(api_url, headers=headers, json=final_payload)
-        final_response.raise_for_status()
-        final_answer = final_response.json()['choices'][0]['message']['content']
-
+        # Replies depend on the history, so only history-free questions are cached.
+        with CHAT_STAGE_SECONDS.time("response_cache"):
+            cache_key = response_cache.make_key(intent, params, tool_result, user_message) if session.is_empty else None
+            cached_reply = response_cache.get(cache_key) if cache_key else None
+        if cache_key: RESPONSE_CACHE_LOOKUPS.inc("hit" if cached_reply is not None else "miss")
+        if cached_reply is not None:
+            _record_turn(session, user_message, cached_reply)
+            _log_chat_interaction(user_message, cached_reply, intent)
+            if stream: return Response(cached_reply, mimetype='text/plain', headers=_session_headers(session_fields))
+            return jsonify({'reply': cached_reply, **session_fields})
+
+        if stream:
+            reply_stream = _stream_reply(token, response_generation_prompt, user_message, intent, cache_key, session)
+            return Response(stream_with_context(reply_stream), mimetype='text/plain', headers=_session_headers(session_fields))
+
+        with CHAT_STAGE_SECONDS.time("generate"):
+            final_answer = llm_client.complete(token, response_generation_prompt, temperature=0.7, max_tokens=250)
+        if cache_key: response_cache.put(cache_key, final_answer)
+
+        _record_turn(session, user_message, final_answer)
         _log_chat_interaction(user_message, final_answer, intent)
-        return jsonify({'reply': final_answer})
+        return jsonify({'reply': final_answer, **session_fields})
 
     except Exception as e:
         print(f"[AI Chat Service] ERROR: {e}")
         _log_chat_interaction(user_message, f"Error: {e}", "error")
         return jsonify({"error": "Sorry, our AI Concierge had an unexpected problem. Please try again."}), 500
 
+def _record_turn(session, user_message, reply):
+    """Stores the exchange in the session; transient (history-payload) sessions are not kept."""
+    if session.id is None: return
+    chat_sessions.add_turn(session, 'user', user_message)
+    chat_sessions.add_turn(session, 'assistant', reply)
+
+def _session_headers(session_fields):
+    """Streamed replies carry the session id in headers, since the body is the bare reply text."""
+    if not session_fields: return {}
+    return {'X-Session-Id': session_fields['session_id'], 'X-Session-Restarted': str(session_fields['session_restarted']).lower()}
+
+def _stream_reply(token, prompt, user_message, intent, cache_key=None, session=None):
+    """Sends the reply to the client token by token and logs the full text once it is complete."""
+    parts = []
+    started = time.perf_counter()
+    try:
+        for delta in llm_client.stream(token, prompt, temperature=0.7, max_tokens=250):
+            if not parts: CHAT_STAGE_SECONDS.observe(time.perf_counter() - started, "generate_first_token")
+            parts.append(delta)
+            yield delta
+        CHAT_STAGE_SECONDS.observe(time.perf_counter() - started, "generate")
+        final_answer = "".join(parts)
+        if cache_key: response_cache.put(cache_key, final_answer)
+        if session is not None: _record_turn(session, user_message, final_answer)
+        _log_chat_interaction(user_message, final_answer, intent)
+    except Exception as e:
+        print(f"[AI Chat Service] ERROR while streaming: {e}")
+        _log_chat_interaction(user_message, f"Error: {e}", "error")
+        if not parts:
+            yield "Sorry, our AI Concierge had an unexpected problem. Please try again."
+
+@app.route('/ready', methods=['GET'])
+def readiness():
+    """200 once this process can answer every endpoint; 503 with the reasons while starting up or draining."""
+    waiting = []
+    if draining: waiting.append('draining')
+    if not services_started: waiting.append('services')
+    if model_registry.active is None: waiting.append('model')
+    if availability_index is None or not availability_index.ready: waiting.append('availability_index')
+    status = 503 if waiting else 200
+    return jsonify({'ready': not waiting, 'waiting_for': waiting, 'pid': os.getpid()}), status
+
+# /cache-stats and /chat-log/stats describe the worker process that answers (see `pid`); /metrics covers all of them.
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({'pid': os.getpid(), 'context': context_cache.stats(), 'responses': response_cache.stats(), 'sessions': chat_sessions.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/chat-log/stats', methods=['GET'])
+def chat_log_stats():
+    return jsonify(chat_log_shipper.stats())
+
 # --- ALL OTHER AI ENDPOINTS (RESTORED & VERIFIED) ---
 @app.route('/predict', methods=['POST'])
 def predict():
-    if prediction_model is None: return jsonify({"error": "Prediction model is not loaded"}), 500
+    forecast_table = _forecast()
+    if forecast_table is None: return jsonify({"error": "Prediction model is not loaded"}), 500
     json_data = request.get_json()
     month = int(json_data.get('month_to_predict'))
-    input_df = pd.DataFrame([[month]], columns=['month_number'])
-    prediction = prediction_model.predict(input_df)
-    return jsonify({'predicted_bookings': round(prediction[0])})
+    return jsonify({'predicted_bookings': forecast_table.predict(month)})
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predictions for many months at once: either an explicit `months` list or `start_month` + `horizon`."""
+    forecast_table = _forecast()
+    if forecast_table is None: return jsonify({"error": "Prediction model is not loaded"}), 500
+    json_data = request.get_json()
+    try:
+        if json_data.get('months') is not None:
+            months = np.asarray([int(m) for m in json_data['months']], dtype=int)
+        else:
+            months = ForecastTable.horizon_months(json_data['start_month'], json_data.get('horizon', 12))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Provide 'months' or 'start_month' (with optional 'horizon')."}), 400
+    predictions = forecast_table.predict_many(months)
+    return jsonify({'predictions': [{'month': int(m), 'predicted_bookings': int(p)} for m, p in zip(months, predictions)]})
+
+@app.route('/model/status', methods=['GET'])
+def model_status():
+    return jsonify(model_registry.status())
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
@@ -209,84 +489,73 @@ def recommend():
 
 @app.route('/smart-assign', methods=['POST'])
 def smart_assign():
+    """Ranks candidate rooms and returns the top-k. Clients send room ids (or dates and a room type);
+    the legacy payload of full room documents is still accepted."""
     data = request.get_json()
-    available_rooms, all_rooms = data.get('available_rooms', []), data.get('all_rooms', [])
-    user_preferences = data.get('user_preferences', {}) # NEW: Get user preferences
-    if not available_rooms: return jsonify({"error": "No available rooms to choose from."}), 400
-
-    scores = {}
-    occupied_floors = {str(room['roomNumber'])[0] for room in all_rooms if not room['isAvailable']}
-
-    for room in available_rooms:
-        room_id = str(room['_id'])
-        room_number_str = str(room['roomNumber'])
-        scores[room_id] = 0
-
-        floor = room_number_str[0] # Get the first digit as floor
-
-        # Base scoring: Prefer less occupied floors
-        if floor in occupied_floors:
-            scores[room_id] += 5 # Slight penalty for occupied floor to spread out bookings
-
-        # Simple floor preference for variety
-        try:
-            scores[room_id] += int(floor) # Higher floors get higher scores (can be adjusted)
-        except ValueError:
-            pass # Ignore if roomNumber is not numeric
-
-        # --- NEW: Apply User Preferences ---
-        if user_preferences:
-            if user_preferences.get('preferredFloor') == 'High Floor':
-                try: # Ensure floor is an integer for comparison
-                    if int(floor) >= 3: # Assuming floors 3 and above are 'High Floor'
-                        scores[room_id] += 5
-                except ValueError: pass
-            elif user_preferences.get('preferredFloor') == 'Low Floor':
-                try:
-                    if int(floor) <= 2: # Assuming floors 1 and 2 are 'Low Floor'
-                        scores[room_id] += 5
-                except ValueError: pass
-
-            if user_preferences.get('roomLocation') == 'Near Elevator':
-                # Example: Rooms ending in '01' might be near elevators. Adjust based on hotel map.
-                # If specific room numbers or ranges are known to be near elevators, refine this.
-                if room_number_str.endswith('01'):
-                    scores[room_id] += 3
-            elif user_preferences.get('roomLocation') == 'Away from Elevator':
-                # Example: Rooms not ending in '01' are considered away.
-                if not room_number_str.endswith('01'):
-                    scores[room_id] += 3
-
-            # You could add more complex logic for interests if room amenities were more detailed/structured
-
-    # If no preferences matched, or all scores are 0, still assign a room.
-    # We choose the one with the highest calculated score.
-    # If scores is empty (e.g., no available rooms), fallback to avoid error.
-    if scores:
-        best_room_id = max(scores, key=scores.get)
-    elif available_rooms: # If scores is empty but available_rooms exist, pick the first one
-        best_room_id = available_rooms[0]['_id']
-    else: # No available rooms at all
-        return jsonify({"error": "No available rooms to assign."}), 400
-
-    return jsonify({'best_room_id': best_room_id})
+    user_preferences = data.get('user_preferences') or {}
+    try:
+        top_k = max(1, int(data.get('top_k', 5)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'top_k' must be an integer."}), 400
+    try:
+        check_in = parse_date(data['check_in']) if data.get('check_in') else None
+        check_out = parse_date(data['check_out']) if data.get('check_out') else None
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({"error": "'check_in' and 'check_out' must be dates."}), 400
+    if check_in and check_out and check_in >= check_out:
+        return jsonify({"error": "The check-in date must be before the check-out date."}), 400
+
+    if data.get('available_rooms'):
+        table = RoomTable(data['available_rooms'])
+        rows = np.arange(len(table))
+        occupied_floors = table.floor_mask_from_numbers(r['roomNumber'] for r in data.get('all_rooms', []) if not r['isAvailable'])
+    else:
+        table = _room_table()
+        if table is None: return jsonify({"error": "Room data is not loaded yet."}), 503
+        booked = _booked_mask(table, check_in, check_out)
+        if data.get('available_room_ids'):
+            rows = table.rows(data['available_room_ids'])
+        elif check_in and check_out:
+            free = ~booked & (table.types == data['room_type']) if data.get('room_type') else ~booked
+            rows = np.flatnonzero(free)
+        else:
+            rows = np.array([], dtype=np.int64)
+        occupied_floors = table.occupied_floor_mask(np.flatnonzero(booked))
+
+    if len(rows) == 0: return jsonify({"error": "No available rooms to choose from."}), 400
+
+    scores = table.score(rows, occupied_floors, user_preferences)
+    ranked = table.top_k(rows, scores, top_k)
+    return jsonify({'best_room_id': ranked[0]['room_id'], 'ranked': ranked})
+
+_room_table_cache = (None, None)
+
+def _room_table():
+    """Columnar room table built from the availability index, rebuilt only when rooms change."""
+    global _room_table_cache
+    if availability_index is None or not availability_index.ready: return None
+    version, table = _room_table_cache
+    if version != availability_index.rooms_version:
+        version = availability_index.rooms_version
+        table = RoomTable(availability_index.rooms())
+        _room_table_cache = (version, table)
+    return table
+
+def _booked_mask(table, check_in, check_out):
+    """Per table row: booked for a night of the requested stay (from the occupancy calendar),
+    or flagged unavailable right now when no dates are given."""
+    if check_in and check_out and occupancy_calendar.ensure_current():
+        room_ids, booked = occupancy_calendar.booked_rooms(check_in, check_out)
+        return table.align(room_ids, booked)
+    return ~table.is_available
 
 
 def _get_price_suggestion(predicted_bookings, active_bookings, total_rooms):
     if total_rooms == 0: return {'suggestion_percent': 0, 'reason': 'No rooms available to price.'}
-    AVERAGE_BOOKINGS_PER_MONTH = 228
-    demand_factor, occupancy_factor = predicted_bookings / AVERAGE_BOOKINGS_PER_MONTH, active_bookings / total_rooms
-    suggestion_score = 0
-    if demand_factor > 1.25: suggestion_score += 10
-    elif demand_factor > 1.1: suggestion_score += 5
-    elif demand_factor < 0.8: suggestion_score -= 5
-    if occupancy_factor > 0.6: suggestion_score += 10
-    elif occupancy_factor > 0.4: suggestion_score += 5
-    if suggestion_score >= 15: percent, reason = 20, "Extremely high demand and booking pace. Capitalize on this peak."
-    elif suggestion_score >= 10: percent, reason = 15, "Both predicted demand and current bookings are strong."
-    elif suggestion_score >= 5: percent, reason = 10, "Predicted demand or booking pace is higher than average."
-    elif suggestion_score <= -5: percent, reason = -10, "Demand is low. A promotion could attract more guests."
-    else: percent, reason = 0, "Demand and booking pace are within the normal range."
+    baseline = baseline_monthly_bookings(model_registry.active)
+    if not baseline: return {'suggestion_percent': 0, 'reason': 'No booking history to compare against.'}
+    demand_factor, occupancy_factor = predicted_bookings / baseline, active_bookings / total_rooms
+    percent, reason = suggestion(int(suggestion_score(demand_factor, occupancy_factor)))
     return {'suggestion_percent': percent, 'reason': reason}
 
 # --- NEW: Helper for demand level ---
@@ -294,8 +563,10 @@ def _get_demand_level(predicted_bookings, total_rooms):
     if total_rooms == 0:
         return {'level': 'Unknown', 'reason': 'No rooms to determine demand.'}
 
-    AVERAGE_BOOKINGS_PER_MONTH = 228
-    demand_factor = predicted_bookings / AVERAGE_BOOKINGS_PER_MONTH
+    baseline = baseline_monthly_bookings(model_registry.active)
+    if not baseline:
+        return {'level': 'Unknown', 'reason': 'No booking history to determine demand.'}
+    demand_factor = predicted_bookings / baseline
 
     if demand_factor >= 1.5:
         return {'level': 'Very High', 'reason': 'Exceptional demand predicted for the next month.'}
@@ -308,17 +579,66 @@ def _get_demand_level(predicted_bookings, total_rooms):
 
 @app.route('/dashboard-stats', methods=['POST'])
 def dashboard_stats():
+    """Forecast and price suggestion for a month. When `year` is sent instead of the booking counts,
+    active bookings, room count and the month's occupancy come from the occupancy calendar; until it has
+    loaded, the forecast is returned with a neutral price suggestion."""
     try:
         data = request.get_json()
         month_to_predict, active_bookings_next_month, total_rooms = data.get('month_to_predict'), data.get('active_bookings_next_month'), data.get('total_rooms')
-        if None in [month_to_predict, active_bookings_next_month, total_rooms]: return jsonify({"error": "Missing required data for stats."}), 400
-        predicted_bookings = round(prediction_model.predict(pd.DataFrame([[month_to_predict]], columns=['month_number']))[0]) if prediction_model is not None else 0
-        price_suggestion = _get_price_suggestion(predicted_bookings, active_bookings_next_month, total_rooms)
-        return jsonify({'predicted_bookings': predicted_bookings, 'price_suggestion': price_suggestion})
+        occupancy = None
+        if month_to_predict is not None and data.get('year') is not None and occupancy_calendar is not None:
+            start, end = month_bounds(data['year'], month_to_predict)
+            occupancy = occupancy_calendar.summary(start, end, granularity='month')
+            if occupancy is not None:
+                if active_bookings_next_month is None: active_bookings_next_month = occupancy_calendar.bookings_overlapping(start, end)
+                if total_rooms is None: total_rooms = occupancy['total_rooms']
+        calendar_pending = data.get('year') is not None and occupancy is None
+        if month_to_predict is None or (None in [active_bookings_next_month, total_rooms] and not calendar_pending):
+            return jsonify({"error": "Missing required data for stats."}), 400
+        forecast_table = _forecast()
+        predicted_bookings = forecast_table.predict(month_to_predict) if forecast_table is not None else 0
+        if None in [active_bookings_next_month, total_rooms]:
+            # No database, or the index is still loading: the forecast still stands, the price stays neutral.
+            price_suggestion = {'suggestion_percent': 0, 'reason': 'Booking data is still loading.'}
+        else:
+            price_suggestion = _get_price_suggestion(predicted_bookings, active_bookings_next_month, total_rooms)
+        result = {'predicted_bookings': predicted_bookings, 'price_suggestion': price_suggestion}
+        if occupancy is not None:
+            result['active_bookings'] = active_bookings_next_month
+            result['occupancy'] = occupancy['totals']
+        return jsonify(result)
     except Exception as e:
         print(f"[AI Service] ERROR in dashboard-stats: {e}")
         return jsonify({"error": "Internal AI error while generating dashboard stats."}), 500
 
+@app.route('/analytics/occupancy', methods=['GET'])
+def occupancy_analytics():
+    """Occupancy rate, booked room-nights and free capacity for [start, end), bucketed by day, week or month
+    and broken down by room type. Defaults to the next 30 days by day."""
+    if occupancy_calendar is None: return jsonify({"error": "Database not connected."}), 503
+    try:
+        start = parse_date(request.args['start']) if request.args.get('start') else datetime.now()
+        end = parse_date(request.args['end']) if request.args.get('end') else start + timedelta(days=30)
+        summary = occupancy_calendar.summary(start, end, request.args.get('granularity', 'day'), request.args.get('room_type'))
+    except (ValueError, OverflowError) as e:
+        return jsonify({"error": str(e)}), 400
+    if summary is None: return jsonify({"error": "Booking data is not loaded yet."}), 503
+    return jsonify(summary)
+
+@app.route('/pricing/grid', methods=['GET'])
+def pricing_grid():
+    """Suggested nightly price per room type for each of the next `days` days (default 365) from `start`."""
+    if pricing_engine is None: return jsonify({"error": "Database not connected."}), 503
+    try:
+        start = parse_date(request.args['start']).date() if request.args.get('start') else None
+        days = int(request.args.get('days', 365))
+        if not 1 <= days <= 3 * 366: raise ValueError("days must be between 1 and 1098")
+    except (ValueError, OverflowError) as e:
+        return jsonify({"error": str(e)}), 400
+    grid = pricing_engine.grid(start, days, request.args.get('room_type'))
+    if grid is None: return jsonify({"error": "Booking data or prediction model is not loaded yet."}), 503
+    return jsonify(grid)
+
 # --- NEW: Demand Level Endpoint for Frontend ---
 @app.route('/demand-level', methods=['POST'])
 def get_demand_level():
@@ -330,7 +650,8 @@ def get_demand_level():
         if None in [month_to_predict, total_rooms]:
             return jsonify({"error": "Missing month_to_predict or total_rooms"}), 400
 
-        predicted_bookings = round(prediction_model.predict(pd.DataFrame([[month_to_predict]], columns=['month_number']))[0]) if prediction_model is not None else 0
+        forecast_table = _forecast()
+        predicted_bookings = forecast_table.predict(month_to_predict) if forecast_table is not None else 0
 
         demand_info = _get_demand_level(predicted_bookings, total_rooms)
         return jsonify(demand_info)
@@ -340,5 +661,10 @@ def get_demand_level():
         return jsonify({"error": "Internal AI error while fetching demand level."}), 500
 
 
+# serve.py defers this to each worker after the fork.
+if not os.environ.get('AI_SERVICE_DEFER_START'):
+    start_services()
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Development server only; run serve.py for multi-worker production serving.
+    app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,260 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from metrics import MONGO_QUERY_SECONDS
+
+# --- In-Memory Availability Index ---
+# Keeps every Active booking in a per-room sorted-interval structure so that
+# availability questions are answered without a round trip to MongoDB.
+# The index is loaded once and then kept fresh by a change stream (replica sets)
+# or, when change streams are unavailable, by a polling delta loader. The stream
+# is opened before the load and resumed from its last token after an error, so
+# no booking written in between is missed.
+
+ROOM_FIELDS = {"roomNumber": 1, "type": 1, "price": 1, "isAvailable": 1, "amenities": 1, "description": 1}
+BOOKING_FIELDS = {"room": 1, "checkInDate": 1, "checkOutDate": 1, "status": 1}
+
+class _RoomSchedule:
+    """Immutable, start-sorted intervals for one room plus a running max of end dates."""
+    __slots__ = ("starts", "ends", "booking_ids", "max_ends")
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals, key=lambda iv: iv[0])
+        self.starts = [iv[0] for iv in intervals]
+        self.ends = [iv[1] for iv in intervals]
+        self.booking_ids = [iv[2] for iv in intervals]
+        self.max_ends = []
+        running = None
+        for end in self.ends:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends, self.booking_ids))
+
+    def overlaps(self, check_in, check_out):
+        """True if any booking satisfies start < check_out and end > check_in."""
+        idx = bisect_left(self.starts, check_out)
+        return idx > 0 and self.max_ends[idx - 1] > check_in
+
+
+_EMPTY_SCHEDULE = _RoomSchedule()
+
+
+class AvailabilityIndex:
+    def __init__(self, bookings_collection, rooms_collection, poll_interval=5.0, full_reload_every=60):
+        self.bookings_collection = bookings_collection
+        self.rooms_collection = rooms_collection
+        self.poll_interval = poll_interval
+        self.full_reload_every = full_reload_every
+        self.ready = False
+        self.version = 0          # Bumped on every booking or room change
+        self.rooms_version = 0    # Bumped only when room documents change
+        self._rooms_by_id = {}
+        self._room_ids_by_number = {}
+        self._schedules = {}
+        self._booking_room = {}
+        self._last_booking_id = None
+        self._resume_token = None  # Change-stream position after the last applied change
+        self._write_lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- Loading ---
+    def load(self):
+        """Full load of rooms and Active bookings. Swaps the whole index in one step."""
+        with MONGO_QUERY_SECONDS.time("rooms_find"):
+            rooms = list(self.rooms_collection.find({}, ROOM_FIELDS))
+        per_room, booking_room, last_id = {}, {}, self._last_booking_id
+        with MONGO_QUERY_SECONDS.time("bookings_load"):
+            for b in self.bookings_collection.find({"status": "Active"}, BOOKING_FIELDS):
+                per_room.setdefault(b["room"], []).append((b["checkInDate"], b["checkOutDate"], b["_id"]))
+                booking_room[b["_id"]] = b["room"]
+                if last_id is None or b["_id"] > last_id:
+                    last_id = b["_id"]
+
+        with self._write_lock:
+            self._set_rooms(rooms)
+            self._schedules = {room_id: _RoomSchedule(ivs) for room_id, ivs in per_room.items()}
+            self._booking_room = booking_room
+            self._last_booking_id = last_id
+            self.version += 1
+            self.ready = True
+        self._notify("reload", None, None)
+
+    def refresh_rooms(self):
+        with MONGO_QUERY_SECONDS.time("rooms_find"):
+            rooms = list(self.rooms_collection.find({}, ROOM_FIELDS))
+        with self._write_lock:
+            if self._set_rooms(rooms):
+                self.version += 1
+        return rooms
+
+    def poll_new_bookings(self):
+        """Delta load: picks up bookings inserted since the last seen _id."""
+        query = {"_id": {"$gt": self._last_booking_id}} if self._last_booking_id is not None else {}
+        with MONGO_QUERY_SECONDS.time("bookings_poll"):
+            bookings = list(self.bookings_collection.find(query, BOOKING_FIELDS).sort("_id", 1))
+        for b in bookings:
+            self.apply_booking(b)
+            self._last_booking_id = b["_id"]
+
+    def _set_rooms(self, rooms):
+        rooms_by_id = {r["_id"]: r for r in rooms}
+        if rooms_by_id == self._rooms_by_id:
+            return False
+        self._rooms_by_id = rooms_by_id
+        self._room_ids_by_number = {str(r.get("roomNumber")): r["_id"] for r in rooms}
+        self.rooms_version += 1
+        return True
+
+    # --- Incremental Updates ---
+    def apply_booking(self, booking):
+        """Inserts, moves or drops a booking depending on its current status."""
+        booking_id = booking["_id"]
+        with self._write_lock:
+            self._remove_locked(booking_id)
+            if booking.get("status") == "Active":
+                room_id = booking["room"]
+                ivs = self._schedules.get(room_id, _EMPTY_SCHEDULE).intervals()
+                insort(ivs, (booking["checkInDate"], booking["checkOutDate"], booking_id), key=lambda iv: iv[0])
+                self._schedules[room_id] = _RoomSchedule(ivs)
+                self._booking_room[booking_id] = room_id
+            self.version += 1
+        self._notify("booking", booking_id, booking)
+
+    def remove_booking(self, booking_id):
+        with self._write_lock:
+            removed = self._remove_locked(booking_id)
+            if removed:
+                self.version += 1
+        if removed:
+            self._notify("booking", booking_id, None)
+
+    def _remove_locked(self, booking_id):
+        room_id = self._booking_room.pop(booking_id, None)
+        if room_id is None:
+            return False
+        ivs = [iv for iv in self._schedules[room_id].intervals() if iv[2] != booking_id]
+        self._schedules[room_id] = _RoomSchedule(ivs)
+        return True
+
+    def subscribe(self, callback):
+        """Registers callback(event, booking_id, booking) for 'reload' and 'booking' events."""
+        self._listeners.append(callback)
+
+    def _notify(self, event, booking_id, booking):
+        for callback in self._listeners:
+            try:
+                callback(event, booking_id, booking)
+            except Exception as e:
+                print(f"[Availability Index] Listener error: {e}")
+
+    # --- Queries ---
+    def room_by_number(self, room_number):
+        room_id = self._room_ids_by_number.get(str(room_number))
+        return self._rooms_by_id.get(room_id) if room_id is not None else None
+
+    def rooms(self):
+        return list(self._rooms_by_id.values())
+
+    def room_intervals(self):
+        """Snapshot of {room_id: [(check_in, check_out, booking_id), ...]} for Active bookings."""
+        return {room_id: schedule.intervals() for room_id, schedule in list(self._schedules.items())}
+
+    def is_free(self, room_id, check_in, check_out):
+        return not self._schedules.get(room_id, _EMPTY_SCHEDULE).overlaps(check_in, check_out)
+
+    def free_rooms(self, check_in, check_out, room_type=None):
+        """All rooms (optionally of one type) with no Active booking overlapping [check_in, check_out)."""
+        schedules = self._schedules
+        return [
+            room for room_id, room in self._rooms_by_id.items()
+            if (room_type is None or room.get("type") == room_type)
+            and not schedules.get(room_id, _EMPTY_SCHEDULE).overlaps(check_in, check_out)
+        ]
+
+    # --- Background Refresh ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="availability-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        from pymongo.errors import OperationFailure
+        while not self._stop.is_set():
+            try:
+                self._watch_changes()
+            except OperationFailure as e:
+                if self._resume_token is not None:
+                    # The resume point was rejected (e.g. rolled off the oplog): start over from a fresh snapshot.
+                    print(f"[Availability Index] Change stream could not resume, reloading: {e}")
+                    self._resume_token = None
+                    continue
+                # Change streams need a replica set; standalone servers land here.
+                print(f"[Availability Index] Change stream unavailable, polling instead: {e}")
+                self._poll_forever()
+            except Exception as e:
+                # Reconnects resume after the last seen change, or reload when no change was seen yet.
+                print(f"[Availability Index] Refresh error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _watch_changes(self):
+        resume_token = self._resume_token
+        with self.bookings_collection.watch(full_document="updateLookup", resume_after=resume_token) as stream:
+            if resume_token is None:
+                # The stream is opened before the snapshot, so bookings written while load() reads are
+                # replayed from it afterwards; applying a change twice is harmless.
+                self.load()
+                self._resume_token = stream.resume_token
+                print(f"[Availability Index] Loaded {len(self._rooms_by_id)} rooms and {len(self._booking_room)} active bookings.")
+            last_rooms_refresh = time.monotonic()
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._apply_change(change)
+                # Kept across reconnects so a dropped stream resumes without a gap.
+                self._resume_token = stream.resume_token
+                if change is not None:
+                    continue
+                if time.monotonic() - last_rooms_refresh >= self.poll_interval:
+                    self.refresh_rooms()
+                    last_rooms_refresh = time.monotonic()
+                self._stop.wait(0.1)
+
+    def _apply_change(self, change):
+        try:
+            if change["operationType"] == "delete":
+                self.remove_booking(change["documentKey"]["_id"])
+            elif change.get("fullDocument"):
+                self.apply_booking(change["fullDocument"])
+        except (KeyError, TypeError) as e:
+            # A malformed booking is skipped rather than replayed forever on every resume.
+            print(f"[Availability Index] Skipping change {change.get('documentKey')}: {e!r}")
+
+    def _poll_forever(self):
+        polls = 0
+        while not self._stop.is_set():
+            try:
+                if not self.ready:
+                    self.load()
+                    print(f"[Availability Index] Loaded {len(self._rooms_by_id)} rooms and {len(self._booking_room)} active bookings.")
+                    continue
+                if self._stop.wait(self.poll_interval):
+                    break
+                polls += 1
+                if polls % self.full_reload_every == 0:
+                    # Status changes (e.g. cancellations) don't move the _id watermark.
+                    self.load()
+                else:
+                    self.refresh_rooms()
+                    self.poll_new_bookings()
+            except Exception as e:
+                print(f"[Availability Index] Polling error: {e}")
+                self._stop.wait(self.poll_interval)
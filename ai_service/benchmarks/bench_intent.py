@@ -0,0 +1,72 @@
+"""Benchmark of the rule-based intent router against a labelled message corpus.
+
+Reports how often the router resolves a message locally (skipping the intent
+LLM call), how accurate those local answers are, and the resulting estimate of
+/chat latency given the latency of one LLM round trip.
+
+    python benchmarks/bench_intent.py --llm-latency 1.2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import intent_router
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'intent_corpus.jsonl')
+CORPUS_TODAY = datetime(2025, 6, 11)  # Relative dates in the corpus are labelled against this day.
+SLOTS = ("room_number", "check_in_date", "check_out_date")
+
+
+def run(corpus_path, llm_latency, repeat, verbose):
+    with open(corpus_path) as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    routed, correct, wrong = 0, 0, []
+    for sample in samples:
+        result = intent_router.route(sample["message"], today=CORPUS_TODAY)
+        if result is None:
+            if verbose: print(f"  LLM    {sample['message']}")
+            continue
+        routed += 1
+        intent, params = result
+        expected = {slot: sample.get(slot) for slot in SLOTS} if sample["intent"] == "specific_availability" else {}
+        if intent == sample["intent"] and {k: params.get(k) for k in expected} == expected:
+            correct += 1
+            if verbose: print(f"  LOCAL  {sample['message']}")
+        else:
+            wrong.append((sample["message"], result))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in samples:
+            intent_router.route(sample["message"], today=CORPUS_TODAY)
+    router_us = (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+    total = len(samples)
+    routed_share = routed / total
+    baseline = 2 * llm_latency
+    with_router = (1 - routed_share) * llm_latency + llm_latency + router_us / 1e6
+
+    print(f"Messages:                    {total}")
+    print(f"Resolved locally:            {routed} ({routed_share:.1%}) -> intent LLM calls avoided")
+    print(f"Share of all LLM calls saved: {routed / (2 * total):.1%}")
+    print(f"Local routing accuracy:      {correct}/{routed} ({(correct / routed if routed else 0):.1%})")
+    print(f"Router cost:                 {router_us:.1f} us/message")
+    print(f"Est. /chat latency:          {baseline:.2f}s -> {with_router:.2f}s ({1 - with_router / baseline:.1%} lower, at {llm_latency}s per LLM call)")
+    for message, result in wrong:
+        print(f"  MISROUTED: {message!r} -> {result}")
+    return 1 if wrong else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per LLM round trip.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(run(args.corpus, args.llm_latency, args.repeat, args.verbose))
@@ -0,0 +1,58 @@
+"""Micro-benchmark of booking-model prediction paths.
+
+Compares the old per-request path (one-row DataFrame + model.predict) with the
+precomputed ForecastTable lookup, the vectorized batch call, and the /predict
+and /predict/batch endpoints through Flask's test client.
+
+    python benchmarks/bench_predict.py --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import pandas as pd
+
+AI_SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, AI_SERVICE_DIR)
+from forecast import ForecastTable
+import runtime_model
+
+
+def timed(label, fn, iterations):
+    fn()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{label:<42} {per_call * 1e6:>10.1f} us/call")
+    return per_call
+
+
+def run(iterations, with_endpoints):
+    warnings.filterwarnings("ignore")
+    model = joblib.load(os.path.join(AI_SERVICE_DIR, 'booking_model.pkl'))
+    table = ForecastTable(runtime_model.from_estimator(model))
+
+    before = timed("DataFrame + model.predict (1 month)", lambda: round(model.predict(pd.DataFrame([[7]], columns=['month_number']))[0]), iterations)
+    after = timed("ForecastTable.predict (1 month)", lambda: table.predict(7), iterations)
+    timed("DataFrame + model.predict x12 (loop)", lambda: [round(model.predict(pd.DataFrame([[m]], columns=['month_number']))[0]) for m in range(1, 13)], max(1, iterations // 12))
+    timed("ForecastTable.predict_many (12 months)", lambda: table.predict_many(ForecastTable.horizon_months(7, 12)), iterations)
+    print(f"Single-month speedup: {before / after:,.0f}x")
+
+    if with_endpoints:
+        os.chdir(AI_SERVICE_DIR)
+        import app as service
+        client = service.app.test_client()
+        timed("POST /predict", lambda: client.post('/predict', json={'month_to_predict': 7}), iterations)
+        timed("POST /predict/batch (12 months)", lambda: client.post('/predict/batch', json={'start_month': 7, 'horizon': 12}), iterations)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--no-endpoints", action="store_true", help="Skip the Flask test-client measurements.")
+    args = parser.parse_args()
+    run(args.iterations, not args.no_endpoints)
@@ -0,0 +1,80 @@
+"""Cold-start budget check for the AI service.
+
+Imports app.py in fresh interpreters and measures import time, peak RSS and
+time to the first /predict answer. It also lists which heavy modules got
+loaded. Exits non-zero when the median breaks the budget or when pandas,
+scikit-learn or joblib are imported for serving. start_services() runs as it
+does under the dev server, against an unreachable MongoDB by default.
+
+    python benchmarks/bench_startup.py --runs 5 --max-seconds 1.5 --max-rss-mb 120
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+AI_SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FORBIDDEN = ("pandas", "sklearn", "joblib", "scipy")
+
+PROBE = f"""
+import json, os, resource, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+client = app.app.test_client()
+response = client.post('/predict', json={{'month_to_predict': 7}})
+first_predict = time.perf_counter() - start
+print(json.dumps({{
+    'import_seconds': imported,
+    'first_predict_seconds': first_predict,
+    'predict_status': response.status_code,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': [m for m in {FORBIDDEN!r} if m in sys.modules],
+}}))
+sys.stdout.flush()
+os._exit(0)  # Skip joining the service's background threads.
+"""
+
+
+def probe(mongo_uri):
+    env = {**os.environ, "MONGO_URI": mongo_uri, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=AI_SERVICE_DIR, env=env, capture_output=True, text=True, timeout=120)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    return json.loads(lines[-1])
+
+
+def run(runs, max_seconds, max_rss_mb, mongo_uri):
+    samples = [probe(mongo_uri) for _ in range(runs)]
+    import_s = statistics.median(s["import_seconds"] for s in samples)
+    predict_s = statistics.median(s["first_predict_seconds"] for s in samples)
+    rss = statistics.median(s["max_rss_mb"] for s in samples)
+    heavy = sorted({m for s in samples for m in s["heavy_modules"]})
+
+    print(f"Runs:                 {runs}")
+    print(f"Import app:           {import_s * 1000:8.1f} ms (median)")
+    print(f"First /predict:       {predict_s * 1000:8.1f} ms after start (status {samples[-1]['predict_status']})")
+    print(f"Peak RSS:             {rss:8.1f} MB (budget {max_rss_mb} MB)")
+    print(f"Heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    failures = []
+    if predict_s > max_seconds: failures.append(f"startup {predict_s:.2f}s > {max_seconds}s")
+    if rss > max_rss_mb: failures.append(f"RSS {rss:.0f} MB > {max_rss_mb} MB")
+    if heavy: failures.append(f"serving imported {', '.join(heavy)}")
+    if any(s["predict_status"] != 200 for s in samples): failures.append("/predict did not answer 200")
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.5, help="Budget for import plus the first /predict.")
+    parser.add_argument("--max-rss-mb", type=float, default=120.0)
+    parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:1/startup_bench", help="Unreachable by default, so startup is measured without a database.")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.max_seconds, args.max_rss_mb, args.mongo_uri))
@@ -0,0 +1,240 @@
+"""Closed-loop load generator for the AI service endpoints.
+
+Each endpoint is driven in turn by --concurrency workers for --duration
+seconds. The report lists requests per second, error count and p50/p95/p99
+latency per endpoint. Payloads are randomised but seeded, and room numbers
+follow the <floor><index> pattern of synthetic_data.py.
+
+Against a service that is already running:
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 16 --duration 20
+
+Self-contained: starts the stub LLM in-process and the service as a
+subprocess, pointed at a database seeded by synthetic_data.py. --serve-cmd
+swaps in another serving mode:
+
+    python benchmarks/load_test.py --spawn --mongo-uri mongodb://localhost:27017/hotel_bench \\
+        --llm-latency 0.3 --json results.json --baseline previous.json
+    python benchmarks/load_test.py --spawn --serve-cmd "python serve.py --bind 127.0.0.1:{port} --workers 4"
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_SERVICE_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, BENCH_DIR)
+from stub_llm import make_server
+
+CORPUS = os.path.join(BENCH_DIR, 'intent_corpus.jsonl')
+DEFAULT_SERVE_CMD = f"{shlex.quote(sys.executable)} -m flask --app app run --port {{port}} --no-reload --with-threads"
+ENDPOINTS = ("chat", "predict", "smart-assign", "dashboard-stats", "demand-level")
+ROOM_TYPES = ("Single", "Double", "Suite")
+
+
+def _room_number(rng, floors):
+    return f"{rng.randint(1, floors)}{rng.randint(1, 50):02d}"
+
+
+def _stay(rng):
+    check_in = date.today() + timedelta(days=rng.randint(0, 180))
+    return check_in, check_in + timedelta(days=rng.randint(1, 5))
+
+
+def payload_builders(messages, floors, history_share):
+    """endpoint -> fn(rng) returning (path, json body)."""
+    def chat(rng):
+        message = rng.choice(messages)
+        if rng.random() < 0.5:
+            check_in, check_out = _stay(rng)
+            message = f"Is room {_room_number(rng, floors)} available from {check_in} to {check_out}?"
+        # Replies with history are never served from the response cache.
+        history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}] if rng.random() < history_share else []
+        return '/chat', {"message": message, "token": "bench", "history": history}
+
+    def predict(rng):
+        return '/predict', {"month_to_predict": rng.randint(1, 12)}
+
+    def smart_assign(rng):
+        check_in, check_out = _stay(rng)
+        return '/smart-assign', {"check_in": str(check_in), "check_out": str(check_out), "room_type": rng.choice(ROOM_TYPES),
+                                 "user_preferences": {"preferredFloor": rng.choice(["High Floor", "Low Floor", None])}}
+
+    def dashboard_stats(rng):
+        month = date.today().month % 12 + 1
+        return '/dashboard-stats', {"month_to_predict": month, "year": date.today().year + (month == 1)}
+
+    def demand_level(rng):
+        return '/demand-level', {"month_to_predict": rng.randint(1, 12), "total_rooms": floors * 50}
+
+    return {"chat": chat, "predict": predict, "smart-assign": smart_assign,
+            "dashboard-stats": dashboard_stats, "demand-level": demand_level}
+
+
+def drive(base_url, build, concurrency, duration, warmup, seed):
+    """Runs one endpoint; returns (latencies of successful requests, error count, elapsed seconds)."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline_box = {}
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        local, local_errors = [], 0
+        while True:
+            path, body = build(rng)
+            start = time.perf_counter()
+            try:
+                response = session.post(base_url + path, json=body, timeout=60)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            finished = time.perf_counter()
+            if finished >= deadline_box["end"]:
+                break
+            if finished >= deadline_box["measure_from"]:
+                if ok:
+                    local.append(finished - start)
+                else:
+                    local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    now = time.perf_counter()
+    deadline_box.update(measure_from=now + warmup, end=now + warmup + duration)
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.asarray(latencies), errors[0], duration
+
+
+def summarize(latencies, errors, elapsed):
+    if len(latencies) == 0:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"requests": int(len(latencies)), "errors": errors, "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+
+def print_report(results, baseline=None):
+    print(f"{'endpoint':<18}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'p95 vs base':>14}")
+    for name, r in results.items():
+        change = ""
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms") and r["p95_ms"]:
+            change = f"{r['p95_ms'] / base['p95_ms'] - 1:+.1%}"
+        fmt = lambda v: f"{v:>10.2f}" if v is not None else f"{'-':>10}"
+        print(f"{name:<18}{r['rps']:>10.1f}{fmt(r['p50_ms'])}{fmt(r['p95_ms'])}{fmt(r['p99_ms'])}{r['errors']:>8}{change:>14}")
+
+
+def regressions(results, baseline, tolerance):
+    """Endpoints whose p95 grew by more than `tolerance` (a fraction) over the baseline run."""
+    slower = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and base.get("p95_ms") and r["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            slower.append(name)
+    return slower
+
+
+def wait_until_ready(base_url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"AI service exited with code {process.returncode} during startup.")
+        try:
+            if requests.get(base_url + '/ready', timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"AI service did not become ready within {timeout}s.")
+
+
+def main(args):
+    with open(CORPUS) as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+    builders = payload_builders(messages, args.floors, args.chat_history_share)
+    endpoints = args.endpoints.split(',') if args.endpoints else list(ENDPOINTS)
+    unknown = set(endpoints) - set(builders)
+    if unknown:
+        print(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        return 2
+
+    stub, service, base_url = None, None, args.url.rstrip('/')
+    try:
+        if args.spawn:
+            stub = make_server(port=args.llm_port, latency=args.llm_latency)
+            threading.Thread(target=stub.serve_forever, daemon=True).start()
+            env = {**os.environ, "MONGO_URI": args.mongo_uri,
+                   "LLM_API_URL": f"http://127.0.0.1:{args.llm_port}/chat/completions"}
+            service = subprocess.Popen(shlex.split(args.serve_cmd.format(port=args.port)), cwd=AI_SERVICE_DIR, env=env,
+                                       stdout=subprocess.DEVNULL if not args.verbose else None, stderr=subprocess.STDOUT)
+            base_url = f"http://127.0.0.1:{args.port}"
+            wait_until_ready(base_url, service, args.startup_timeout)
+
+        results = {}
+        for i, name in enumerate(endpoints):
+            latencies, errors, elapsed = drive(base_url, builders[name], args.concurrency, args.duration, args.warmup, args.seed + i)
+            results[name] = summarize(latencies, errors, elapsed)
+
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        stub_note = f", stub LLM latency {args.llm_latency}s" if args.spawn else ""
+        print(f"\n{args.concurrency} workers, {args.duration:.0f}s per endpoint{stub_note}")
+        print_report(results, baseline)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"concurrency": args.concurrency, "duration": args.duration, "serve_cmd": args.serve_cmd if args.spawn else None,
+                           "results": results}, f, indent=2)
+        slower = regressions(results, baseline, args.tolerance) if baseline else []
+        if slower:
+            print(f"REGRESSION: p95 grew more than {args.tolerance:.0%} on {', '.join(slower)}")
+            return 1
+        return 0
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Service to load when --spawn is not given.")
+    parser.add_argument("--endpoints", help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per endpoint.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each endpoint's run.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--floors", type=int, default=40, help="Floors in the seeded dataset (50 rooms per floor).")
+    parser.add_argument("--chat-history-share", type=float, default=0.5, help="Share of /chat requests sent with history.")
+    parser.add_argument("--spawn", action="store_true", help="Start the stub LLM and the AI service locally.")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/hotel_bench")
+    parser.add_argument("--serve-cmd", default=DEFAULT_SERVE_CMD, help="Command run in ai_service/; {port} is substituted.")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--llm-port", type=int, default=8765)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds the stub LLM waits before answering.")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Write results to this file.")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare p95 against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline.")
+    parser.add_argument("--verbose", action="store_true", help="Show the spawned service's output.")
+    args = parser.parse_args()
+    sys.exit(main(args))
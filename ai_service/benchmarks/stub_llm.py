@@ -0,0 +1,83 @@
+"""Local stand-in for the chat-completions inference API.
+
+Point the AI service at it with LLM_API_URL=http://127.0.0.1:8765/chat/completions.
+
+    python benchmarks/stub_llm.py --port 8765 --latency 0.4 --fail-rate 0.1
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INTENT_REPLY = json.dumps({"intent": "general_question", "parameters": {}})
+CHAT_REPLY = "Hello! Check-in is at 3:00 PM and check-out is at 11:00 AM. Let me know if I can help with anything else."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    fail_rate = 0.0
+    token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            self._send(random.choice([429, 503]), {"error": "stub failure"}, {"Retry-After": "0"})
+            return
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        reply = INTENT_REPLY if "intent router" in prompt else CHAT_REPLY
+        if body.get("stream"):
+            self._stream(reply)
+        else:
+            self._send(200, {"choices": [{"message": {"role": "assistant", "content": reply}}]})
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in reply.split(" "):
+            self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word + ' '}}]})}\n\n")
+            time.sleep(self.token_delay)
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def make_server(host="127.0.0.1", port=8765, latency=0.0, fail_rate=0.0, token_delay=0.0):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency, "fail_rate": fail_rate, "token_delay": token_delay})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 429/503.")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens.")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.latency, args.fail_rate, args.token_delay)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/chat/completions")
+    server.serve_forever()
@@ -0,0 +1,177 @@
+"""Seeded synthetic hotel dataset for load tests.
+
+Writes rooms and bookings shaped like the Node app's Room and Booking models
+(see hotel-management-app/seed.js) into a dedicated MongoDB database. Demand
+is seasonal like seed.js: June-August and December get roughly twice the
+bookings. Stays last 1-5 nights. Bookings that end before --today are
+Completed (a few are Canceled); the rest are Active. Like the app's booking
+route, no two non-canceled bookings of a room overlap: each booking takes a
+room that is free for its nights, and a booking that finds every room taken
+is left out (the count is reported). Dates are relative to --today and
+ObjectIds are derived from the seed, so the same seed and --today always
+produce the same data.
+
+    python benchmarks/synthetic_data.py --mongo-uri mongodb://localhost:27017/hotel_bench \\
+        --rooms 2000 --bookings 500000 --seed 42 --today 2025-06-11
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from pymongo import MongoClient
+
+ROOM_TYPES = {
+    # type: (share of rooms, nightly price range, amenities, description)
+    "Single": (0.4, (85, 120), ["WiFi", "TV", "Workspace"],
+               "A cozy and modern single room, perfect for the solo traveler seeking comfort and quiet."),
+    "Double": (0.4, (130, 170), ["WiFi", "TV", "Mini Bar", "Seating Area"],
+               "A spacious double room designed for couples or friends."),
+    "Suite": (0.2, (200, 320), ["WiFi", "TV", "Lounge Access", "Separate Living Room"],
+              "Experience ultimate luxury in our suite, featuring a separate living room and a king-sized bed."),
+}
+IMAGES = {"Single": ["/img/single/1.jpg"], "Double": ["/img/double/1.jpg"], "Suite": ["/img/suite/1.jpg"]}
+GUESTS = [("John Doe", "john@example.com"), ("Jane Smith", "jane@example.com"), ("Alex Kim", "alex@example.com"),
+          ("Maria Garcia", "maria@example.com"), ("Sam Patel", "sam@example.com")]
+PEAK_MONTHS = (6, 7, 8, 12)
+ROOMS_PER_FLOOR = 50
+CANCEL_RATE = 0.05
+
+
+class IdFactory:
+    """Sequential ObjectIds: the timestamp of `moment`, then the seed, then a counter."""
+    def __init__(self, seed_value, moment):
+        self.prefix = f"{int(moment.timestamp()) & 0xFFFFFFFF:08x}{seed_value & 0xFFFFFF:06x}"
+        self.counter = 0
+
+    def __call__(self):
+        self.counter += 1
+        return ObjectId(f"{self.prefix}{self.counter:010x}")
+
+
+def make_rooms(count, rng, new_id):
+    """Room documents; numbers are <floor><two-digit index> so floor and elevator rules apply."""
+    names = list(ROOM_TYPES)
+    types = rng.choice(names, size=count, p=[ROOM_TYPES[t][0] for t in names])
+    rooms = []
+    for i, room_type in enumerate(types):
+        share, (low, high), amenities, description = ROOM_TYPES[room_type]
+        floor, index = divmod(i, ROOMS_PER_FLOOR)
+        rooms.append({
+            "_id": new_id(),
+            "roomNumber": f"{floor + 1}{index + 1:02d}",
+            "type": str(room_type),
+            "price": int(rng.integers(low, high + 1)),
+            "isAvailable": bool(rng.random() > 0.1),
+            "description": description,
+            "images": IMAGES[room_type],
+            "virtualTourImages": [],
+            "amenities": amenities,
+        })
+    return rooms
+
+
+def booking_batches(rooms, count, start, days, batch_size, rng, today, new_id, skipped):
+    """Yields lists of booking documents in check-in order, generated a batch at a time with NumPy.
+
+    Every room keeps the first day it is free again. A booking takes its randomly drawn room when
+    that room is free on its check-in day, otherwise a random room that is; with bookings in
+    check-in order that rules out overlaps. Bookings that find no free room are counted in
+    skipped[0] and left out."""
+    day_offsets = np.arange(days)
+    months = np.array([(start + timedelta(days=int(d))).month for d in day_offsets])
+    weights = np.where(np.isin(months, PEAK_MONTHS), 2.0, 1.0)
+    weights /= weights.sum()
+    room_ids = [r["_id"] for r in rooms]
+    today_offset = (today - start).days
+    next_free = np.zeros(len(room_ids), dtype=np.int64)
+
+    check_in = np.sort(rng.choice(day_offsets, size=count, p=weights))
+    for first in range(0, count, batch_size):
+        n = min(batch_size, count - first)
+        batch_check_in = check_in[first:first + n]
+        nights = rng.integers(1, 6, size=n)
+        lead = rng.integers(0, 90, size=n)
+        room_index = rng.integers(0, len(room_ids), size=n)
+        fallback = rng.random(n)
+        guest_index = rng.integers(0, len(GUESTS), size=n)
+        past = batch_check_in + nights <= today_offset
+        canceled = rng.random(n) < CANCEL_RATE
+        status = np.where(canceled, "Canceled", np.where(past, "Completed", "Active"))
+        docs = []
+        for i in range(n):
+            day = int(batch_check_in[i])
+            room = int(room_index[i])
+            if not canceled[i]:
+                # Canceled bookings hold no room, so they may overlap anything.
+                if next_free[room] > day:
+                    free = np.flatnonzero(next_free <= day)
+                    if len(free) == 0:
+                        skipped[0] += 1
+                        continue
+                    room = int(free[int(fallback[i] * len(free))])
+                next_free[room] = day + int(nights[i])
+            check_in_date = start + timedelta(days=day)
+            name, email = GUESTS[guest_index[i]]
+            docs.append({
+                "_id": new_id(),
+                "guestName": name,
+                "guestEmail": email,
+                "room": room_ids[room],
+                "checkInDate": check_in_date,
+                "checkOutDate": check_in_date + timedelta(days=int(nights[i])),
+                "bookingDate": min(check_in_date - timedelta(days=int(lead[i])), today),
+                "status": str(status[i]),
+            })
+        yield docs
+
+
+def seed(mongo_uri, rooms_count, bookings_count, seed_value, history_days, future_days, batch_size, today=None):
+    client = MongoClient(mongo_uri)
+    db = client.get_database()
+    if db.name in ("test", "admin", "local"):
+        # Guard against wiping a default or production database by accident.
+        print(f"Refusing to seed database '{db.name}'; put a dedicated database name in the URI.")
+        return 1
+
+    rng = np.random.default_rng(seed_value)
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=history_days)
+    # Ids carry the start date, so bookings the app creates later sort after them (the index polls by _id).
+    new_id = IdFactory(seed_value, start)
+
+    print(f"Clearing rooms and bookings in '{db.name}'...")
+    db.rooms.delete_many({})
+    db.bookings.delete_many({})
+
+    rooms = make_rooms(rooms_count, rng, new_id)
+    db.rooms.insert_many(rooms)
+    print(f"{len(rooms)} rooms seeded.")
+
+    started, inserted, skipped = time.perf_counter(), 0, [0]
+    for docs in booking_batches(rooms, bookings_count, start, history_days + future_days, batch_size, rng, today, new_id, skipped):
+        if docs:
+            db.bookings.insert_many(docs, ordered=False)
+        inserted += len(docs)
+        print(f"\r{inserted}/{bookings_count} bookings seeded.", end="", flush=True)
+    print(f"\nDone in {time.perf_counter() - started:.1f}s.")
+    if skipped[0]:
+        print(f"{skipped[0]} bookings left out because every room was taken; lower --bookings or raise --rooms.")
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/hotel_bench")
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history-days", type=int, default=3 * 365, help="Days of booking history before today.")
+    parser.add_argument("--future-days", type=int, default=365, help="Days of forward bookings after today.")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--today", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), help="Anchor date (YYYY-MM-DD); defaults to today.")
+    args = parser.parse_args()
+    sys.exit(seed(args.mongo_uri, args.rooms, args.bookings, args.seed, args.history_days, args.future_days, args.batch_size, args.today))
@@ -0,0 +1,250 @@
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from metrics import MONGO_QUERY_SECONDS
+
+# --- Background Chat-Log Shipper ---
+# Chat interactions are queued in memory and written in batches by a worker
+# thread, so logging never blocks a /chat request. When the queue is full new
+# entries are dropped and counted. When the sink is down, batches are appended
+# to a spill file and replayed once the sink recovers.
+
+class MongoSink:
+    """Writes straight to the collection behind the Node app's ChatLog model."""
+    def __init__(self, collection):
+        self.collection = collection
+
+    def send(self, docs):
+        with MONGO_QUERY_SECONDS.time("chatlogs_insert"):
+            self.collection.insert_many([dict(doc) for doc in docs], ordered=False)
+
+
+class HttpSink:
+    """Posts batches to the Node app's /api/log-chat/batch endpoint."""
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, docs):
+        logs = [{**doc, "timestamp": doc["timestamp"].isoformat()} for doc in docs]
+        response = self.session.post(self.url, json={"logs": logs}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class ChatLogShipper:
+    def __init__(self, sink, max_queue=10000, batch_size=100, flush_interval=1.0, spill_path=None, retry_interval=30.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # A "{pid}" in spill_path gives every process its own spill file; files left by exited processes are adopted.
+        self.spill_template = spill_path if spill_path and "{pid}" in spill_path else None
+        self.spill_path = spill_path.replace("{pid}", str(os.getpid())) if self.spill_template else spill_path
+        self.retry_interval = retry_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._spill_lock = threading.Lock()
+        self._last_failure = None
+        self._next_adopt = 0.0
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.corrupt_lines = 0
+        self.worker_errors = 0
+
+    def submit(self, user_input, ai_response, intent="general"):
+        """Non-blocking; returns False when the entry had to be dropped."""
+        if not user_input or not ai_response:
+            return False
+        doc = {"userInput": str(user_input).strip(), "aiResponse": str(ai_response), "intent": intent or "general_question",
+               "timestamp": datetime.now(timezone.utc)}
+        try:
+            self._queue.put_nowait(doc)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="chat-log-shipper", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=5.0):
+        """Stops the worker after it has drained and flushed the queue."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                batch = self._take_batch(self.flush_interval)
+                if batch:
+                    self._ship(batch)
+                elif self.spill_template and time.monotonic() >= self._next_adopt:
+                    self._next_adopt = time.monotonic() + self.retry_interval
+                    self._adopt_orphans()
+                elif self._should_replay():
+                    self._replay_spill()
+                errors = 0
+            except Exception as e:
+                # Keep the worker alive; back off so a persistent fault doesn't spin.
+                errors += 1
+                self.worker_errors += 1
+                print(f"[Chat Log Shipper] Worker error: {e!r}")
+                self._stop.wait(min(self.flush_interval * 2 ** errors, self.retry_interval))
+        # Final drain on shutdown.
+        while True:
+            batch = self._take_batch(0)
+            if not batch:
+                break
+            try:
+                self._ship(batch)
+            except Exception as e:
+                print(f"[Chat Log Shipper] Dropping {len(batch)} entries on shutdown: {e!r}")
+                self.dropped += len(batch)
+
+    def _take_batch(self, wait):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=wait) if wait else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _ship(self, batch):
+        if self._last_failure is not None and time.monotonic() - self._last_failure < self.retry_interval:
+            self._spill(batch)  # Sink recently failed; don't stall the queue on timeouts.
+            return
+        try:
+            self.sink.send(batch)
+            self.sent += len(batch)
+            self._last_failure = None
+        except Exception as e:
+            print(f"[Chat Log Shipper] Sink failed, spilling {len(batch)} entries: {e}")
+            self.failed_batches += 1
+            self._last_failure = time.monotonic()
+            self._spill(batch)
+
+    def _spill(self, batch):
+        if not self.spill_path:
+            self.dropped += len(batch)
+            return
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for doc in batch:
+                    f.write(json.dumps({**doc, "timestamp": doc["timestamp"].isoformat()}) + "\n")
+        except OSError as e:
+            print(f"[Chat Log Shipper] Could not spill {len(batch)} entries, dropping them: {e}")
+            self.dropped += len(batch)
+            return
+        self.spilled += len(batch)
+
+    def _replay_paths(self):
+        return sorted(glob.glob(glob.escape(self.spill_path) + ".replay*"))
+
+    def _should_replay(self):
+        if not self.spill_path:
+            return False
+        if not os.path.exists(self.spill_path) and not self._replay_paths():
+            return False
+        return self._last_failure is None or time.monotonic() - self._last_failure >= self.retry_interval
+
+    def _adopt_orphans(self):
+        """Claims the spill files of processes that have exited by renaming them onto this process's replay list."""
+        prefix, suffix = self.spill_template.split("{pid}", 1)
+        pattern = re.compile(re.escape(prefix) + r"(\d+)" + re.escape(suffix) + r"(.*)$")
+        for path in glob.glob(glob.escape(prefix) + "*" + glob.escape(suffix) + "*"):
+            match = pattern.match(path)
+            if match is None or int(match.group(1)) == os.getpid() or _process_alive(int(match.group(1))):
+                continue
+            try:
+                os.rename(path, f"{self.spill_path}.replay-{match.group(1)}{match.group(2)}")
+            except FileNotFoundError:
+                pass  # Another worker adopted it first.
+
+    def _replay_spill(self):
+        # Replay files left by an earlier attempt or adopted from exited processes go first;
+        # the spill file is only rotated once they are done.
+        replay_paths = self._replay_paths()
+        if not replay_paths:
+            replay_path = self.spill_path + ".replay"
+            with self._spill_lock:
+                os.replace(self.spill_path, replay_path)
+            replay_paths = [replay_path]
+        for replay_path in replay_paths:
+            if not self._replay_file(replay_path):
+                return
+
+    def _replay_file(self, replay_path):
+        """Sends one replay file; False if the sink failed and the rest went back to the spill file."""
+        docs = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    doc = json.loads(line)
+                    doc["timestamp"] = datetime.fromisoformat(doc["timestamp"])
+                except (ValueError, TypeError, KeyError):
+                    # Torn lines, e.g. the tail of a write cut short by a crash, are skipped and counted.
+                    if line.strip():
+                        self.corrupt_lines += 1
+                    continue
+                docs.append(doc)
+        sent, ok = 0, True
+        try:
+            for sent in range(0, len(docs), self.batch_size):
+                self.sink.send(docs[sent:sent + self.batch_size])
+            sent = len(docs)
+        except Exception as e:
+            # Whatever was not confirmed goes back to the spill file for the next attempt.
+            print(f"[Chat Log Shipper] Spill replay failed: {e}")
+            self._last_failure = time.monotonic()
+            spilled = self.spilled
+            self._spill(docs[sent:])
+            self.spilled = spilled  # Re-spilled entries were already counted.
+            ok = False
+        self.replayed += sent
+        os.remove(replay_path)
+        return ok
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "corrupt_lines": self.corrupt_lines,
+            "worker_errors": self.worker_errors,
+        }
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user.
+    return True
@@ -0,0 +1,154 @@
+import math
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# --- Server-Side Chat Sessions ---
+# Conversation history lives here, keyed by a session id handed to the client,
+# so each /chat turn only carries the new message. Sessions are evicted
+# least-recently-used beyond max_sessions and after ttl seconds idle.
+# Every turn's token estimate is computed once when it is stored. When a
+# session's history exceeds its token budget, the oldest turns are folded into
+# a rolling summary of one short line per turn, itself capped to a budget, so
+# the history part of the prompt stays bounded however long the chat runs.
+# The store is per process; under several workers a session only lives in the
+# worker that created it. Clients therefore also send their last few turns, and
+# a worker that does not know the session id seeds the new session from them.
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def estimate_tokens(text):
+    """Rough BPE token count: words plus punctuation, scaled for sub-word splits."""
+    return math.ceil(len(_TOKEN_RE.findall(text or "")) * 1.3)
+
+
+def _snippet(text, limit=SUMMARY_SNIPPET_CHARS):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+class ChatSession:
+    __slots__ = ("id", "turns", "summary", "tokens", "summary_tokens", "last_used", "compactions")
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.turns = []            # [(role, content, tokens)]
+        self.summary = []          # [(line, tokens)], oldest first
+        self.tokens = 0            # Sum of turn tokens
+        self.summary_tokens = 0
+        self.last_used = time.monotonic()
+        self.compactions = 0
+
+    @property
+    def is_empty(self):
+        return not self.turns and not self.summary
+
+    def history(self):
+        """History for the generation prompt: the rolling summary text and the recent turns."""
+        return " ".join(line for line, _ in self.summary), [{"role": role, "content": content} for role, content, _ in self.turns]
+
+    @property
+    def prompt_tokens(self):
+        return self.tokens + self.summary_tokens
+
+
+class ChatSessionStore:
+    def __init__(self, max_sessions=10000, ttl=1800.0, token_budget=1200, summary_budget=300, min_recent_turns=2):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.min_recent_turns = min_recent_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.compactions = 0
+
+    def get_or_create(self, session_id=None):
+        """(session, restarted). Unknown or expired ids get a fresh session with a new id."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and now - session.last_used > self.ttl:
+                del self._sessions[session_id]
+                self.expired += 1
+                session = None
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+                return session, False
+            session = ChatSession(secrets.token_urlsafe(16))
+            self._sessions[session.id] = session
+            self.created += 1
+            self._evict_locked(now)
+            return session, bool(session_id)
+
+    def transient(self, history):
+        """Unstored session seeded from a client-sent history, compacted like a stored one."""
+        session = ChatSession(None)
+        self._seed(session, history)
+        return session
+
+    def seed(self, session, history):
+        """Fills an empty stored session from a client-sent history, e.g. after it was restarted on another worker."""
+        with self._lock:
+            if session.is_empty:
+                self._seed(session, history)
+
+    def _seed(self, session, history):
+        for turn in history or []:
+            if isinstance(turn, dict) and turn.get("content"):
+                self._append(session, turn.get("role") or "user", str(turn["content"]))
+
+    def add_turn(self, session, role, content):
+        with self._lock:
+            self._append(session, role, content)
+
+    def _append(self, session, role, content):
+        tokens = estimate_tokens(content)
+        # A single oversized message is cut so it cannot consume the whole budget on its own.
+        if tokens > self.token_budget // 2:
+            content = _snippet(content, limit=self.token_budget * 2)
+            tokens = estimate_tokens(content)
+        session.turns.append((role, content, tokens))
+        session.tokens += tokens
+        self._compact(session)
+
+    def _compact(self, session):
+        folded = 0
+        while session.tokens > self.token_budget and len(session.turns) > self.min_recent_turns:
+            role, content, tokens = session.turns.pop(0)
+            session.tokens -= tokens
+            line = f"{'Guest' if role == 'user' else 'Concierge'}: {_snippet(content)}"
+            line_tokens = estimate_tokens(line)
+            session.summary.append((line, line_tokens))
+            session.summary_tokens += line_tokens
+            folded += 1
+        while session.summary_tokens > self.summary_budget and session.summary:
+            _, line_tokens = session.summary.pop(0)
+            session.summary_tokens -= line_tokens
+        if folded:
+            session.compactions += 1
+            self.compactions += 1
+
+    def _evict_locked(self, now):
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions:
+                self.evicted += 1
+            elif now - oldest.last_used > self.ttl:
+                self.expired += 1
+            else:
+                break
+            del self._sessions[oldest_id]
+
+    def stats(self):
+        return {"sessions": len(self._sessions), "created": self.created, "evicted": self.evicted,
+                "expired": self.expired, "compactions": self.compactions,
+                "token_budget": self.token_budget, "summary_budget": self.summary_budget}
@@ -0,0 +1,108 @@
+import threading
+import time
+
+# --- Hotel Context Cache ---
+# Stores the rendered general-context text with its min/max price aggregates.
+# The text is reused until the TTL expires or the rooms version changes; on a
+# rebuild only the lines of rooms whose fields changed are re-rendered.
+
+
+class HotelContextCache:
+    def __init__(self, fetch_rooms, hotel_info, version_fn=None, ttl=60.0):
+        self.fetch_rooms = fetch_rooms
+        self.hotel_info = hotel_info
+        self.version_fn = version_fn
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._text = None
+        self._version = None
+        self._built_at = 0.0
+        self._lines = {}          # roomNumber -> (fingerprint, rendered line)
+        self.min_price = None
+        self.max_price = None
+        self.hits = 0
+        self.rebuilds = 0
+        self.lines_rendered = 0
+        self.lines_reused = 0
+        self.last_call = None
+
+    def invalidate(self):
+        with self._lock:
+            self._text = None
+
+    def get(self):
+        start = time.perf_counter()
+        version = self.version_fn() if self.version_fn else None
+        text = self._text
+        if text is not None and version == self._version and time.monotonic() - self._built_at < self.ttl:
+            self.hits += 1
+            self._record(True, start, 0)
+            return text
+
+        with self._lock:
+            # Another thread may have rebuilt while we waited for the lock.
+            if self._text is not None and version == self._version and time.monotonic() - self._built_at < self.ttl:
+                self.hits += 1
+                self._record(True, start, 0)
+                return self._text
+            text, rendered = self._rebuild()
+            self._version = version
+            self._built_at = time.monotonic()
+            self._text = text
+            self.rebuilds += 1
+            self._record(False, start, rendered)
+            return text
+
+    def _rebuild(self):
+        rooms = self.fetch_rooms()
+        if not rooms:
+            self._lines = {}
+            self.min_price = self.max_price = None
+            return "No room information available.", 0
+
+        info = self.hotel_info
+        parts = [
+            "Here is the current, real-time information about our hotel:\n",
+            f"- General Info: Check-in is at {info['check_in_time']}, Check-out is at {info['check_out_time']}.\n",
+            f"- General Amenities: {', '.join(info['amenities'])}.\n\n",
+            "=== Room Details & Live Status ===\n",
+        ]
+        lines, rendered, prices = {}, 0, []
+        for room in rooms:
+            key = room.get('roomNumber')
+            fingerprint = (room.get('type'), room.get('price'), bool(room.get('isAvailable')))
+            cached = self._lines.get(key)
+            if cached is not None and cached[0] == fingerprint:
+                line = cached[1]
+                self.lines_reused += 1
+            else:
+                status = "available for immediate booking" if room.get('isAvailable') else "currently occupied"
+                line = f"- Room {key} is a {room.get('type')} that costs ${room.get('price')} per night. Its current status is {status}.\n"
+                rendered += 1
+            lines[key] = (fingerprint, line)
+            parts.append(line)
+            if 'price' in room:
+                prices.append(room['price'])
+        self._lines = lines
+        self.lines_rendered += rendered
+
+        self.min_price = min(prices) if prices else None
+        self.max_price = max(prices) if prices else None
+        if prices: parts.append(f"\nThe most expensive room costs ${self.max_price} and the cheapest costs ${self.min_price}.\n")
+        return "".join(parts), rendered
+
+    def _record(self, hit, start, rendered):
+        self.last_call = {"hit": hit, "duration_ms": round((time.perf_counter() - start) * 1000, 3), "lines_rendered": rendered}
+
+    def stats(self):
+        calls = self.hits + self.rebuilds
+        return {
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "hit_rate": round(self.hits / calls, 4) if calls else 0.0,
+            "lines_rendered": self.lines_rendered,
+            "lines_reused": self.lines_reused,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "last_call": self.last_call,
+        }
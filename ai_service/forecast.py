@@ -0,0 +1,39 @@
+import numpy as np
+
+# --- Precomputed Booking Forecast ---
+# The booking model only ever sees month_number 1-12, so all twelve predictions
+# are computed in one call when the model loads. Single-month lookups become a
+# dict access and batch requests a single NumPy fancy-index. `model` is a
+# runtime_model.RuntimeModel, which takes month numbers directly.
+
+MONTHS = np.arange(1, 13)
+
+
+class ForecastTable:
+    def __init__(self, model):
+        self.model = model
+        self.values = np.asarray(model.predict(MONTHS), dtype=float)
+        self.rounded = np.rint(self.values).astype(int)
+        self.by_month = {int(m): int(v) for m, v in zip(MONTHS, self.rounded)}
+
+    def predict(self, month):
+        """Rounded predicted bookings for one month; months outside 1-12 are extrapolated by the model."""
+        month = int(month)
+        value = self.by_month.get(month)
+        return value if value is not None else int(self.predict_many([month])[0])
+
+    def predict_many(self, months):
+        """Vectorized rounded predictions for an array of month numbers."""
+        months = np.asarray(months, dtype=int)
+        in_table = (months >= 1) & (months <= 12)
+        result = np.empty(months.shape, dtype=int)
+        result[in_table] = self.rounded[months[in_table] - 1]
+        if not in_table.all():
+            outside = months[~in_table]
+            result[~in_table] = np.rint(self.model.predict(outside)).astype(int)
+        return result
+
+    @staticmethod
+    def horizon_months(start_month, horizon):
+        """Month numbers for `horizon` consecutive months starting at start_month, wrapping past December."""
+        return (int(start_month) - 1 + np.arange(int(horizon))) % 12 + 1
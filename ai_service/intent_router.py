@@ -0,0 +1,150 @@
+import re
+from datetime import datetime, timedelta
+
+from dateutil.parser import parse as parse_date
+
+# --- Rule-Based Intent Router ---
+# Resolves the intent and slots of clear-cut chat messages locally so that the
+# intent-detection LLM call can be skipped. route() returns None whenever the
+# message is ambiguous, and the caller falls back to the LLM router.
+
+_MONTHS = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+
+ROOM_RE = re.compile(r"\b(?:room|rm|suite)\s*(?:#|no\.?|number)?\s*(\d{2,4}[a-z]?)\b|#(\d{2,4})\b", re.I)
+ROOM_MENTION_RE = re.compile(r"\b(?:room|rm|suite)\s*(?:#|no\.?|number)?\s*\d|#\d", re.I)  # Any numbered room, e.g. "room 5"
+DATE_RE = re.compile(
+    r"\b\d{4}-\d{1,2}-\d{1,2}\b"                                   # 2025-07-04
+    r"|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b"                            # 7/4, 7/4/2025
+    rf"|\b{_MONTHS}\.?\s+{_DAY}(?:,?\s+\d{{4}})?\b"                 # July 4th, Jul 4, 2025
+    rf"|\b{_DAY}\s+(?:of\s+)?{_MONTHS}\b(?:,?\s+\d{{4}})?",          # 4th of July
+    re.I,
+)
+RELATIVE_RE = re.compile(r"\b(today|tonight|tomorrow|(?:this|next) weekend)\b", re.I)
+NIGHTS_RE = re.compile(r"\b(\d{1,2}|one|two|three|four|five|six|seven)\s+nights?\b", re.I)
+AVAILABILITY_RE = re.compile(r"\b(availab\w*|free|vacan\w*|open|book(?:ed|able)?|reserv\w*|taken|occupied)\b", re.I)
+GENERAL_RE = re.compile(
+    r"\b(check[\s-]?in time|check[\s-]?out time|what time|amenit\w*|pool|wi-?fi|internet|parking|gym|fitness|"
+    r"restaurant|breakfast|dining|business center|price\w*|cost\w*|cheap\w*|expensive|rates?|location|address|"
+    r"where is|phone|contact|call you|types? of rooms?|room types|suites?|singles?|doubles?|hello|hi|hey|thanks?)\b",
+    re.I,
+)
+# Date-like wording the parser above does not understand. Checked after the parsed spans are blanked
+# out, so "from July 4 to July 8" passes while "from the 4th to the 6th" or "next Friday" does not.
+UNPARSED_TEMPORAL_RE = re.compile(
+    r"\b(?:mon|tues|wednes|thurs|fri|satur|sun)days?\b"
+    r"|\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b"
+    r"|\b(?:in|during|for|of|until|by|before|after)\s+may\b"          # "May I book..." is not a date
+    r"|\b\d{1,2}(?:st|nd|rd|th)\b"
+    r"|\b(?:next|this|coming|following)\s+(?:week|month|year)\b|\bweekdays?\b"
+    r"|\b\d{1,2}\.\d{1,2}(?:\.\d{2,4})?\b"
+    r"|\b(?:christmas|xmas|new year'?s?|easter|thanksgiving|halloween|valentine'?s?|holidays?)\b"
+    r"|\b(?:from|until|till|between|on|through|starting|after|before)\s+(?!(?:to|and|till|until|for)\b)[\w']",
+    re.I,
+)
+ROOMS_WANTED_RE = re.compile(r"\b(rooms?|anything|vacanc\w*)\b", re.I)
+_WORD_NUMBERS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7}
+
+
+def route(message, today=None):
+    """Returns (intent, parameters) when the message can be routed confidently, otherwise None."""
+    if not message or len(message) > 300:
+        return None
+    try:
+        return _route(message, today)
+    except Exception as e:
+        # Any parsing surprise just hands the message to the LLM router.
+        print(f"[Intent Router] Falling back to the LLM for {message!r}: {e!r}")
+        return None
+
+
+def _route(message, today):
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    room_match = ROOM_RE.search(message)
+    room_number = (room_match.group(1) or room_match.group(2)).upper() if room_match else None
+    if room_number is None and ROOM_MENTION_RE.search(message):
+        return None  # A room number we cannot read reliably; don't answer for every room.
+    dates = _extract_dates(message, today)
+    if dates is None:
+        return None
+    wants_availability = bool(AVAILABILITY_RE.search(message))
+    if wants_availability and _unparsed_temporal(message):
+        return None  # The guest named dates we could not read; an answer without them would be wrong.
+    if wants_availability and not room_number and (not ROOMS_WANTED_RE.search(message) or GENERAL_RE.search(message)):
+        return None  # "Is the restaurant open this weekend?" is not a room search.
+
+    if wants_availability and (room_number or len(dates) == 2):
+        if len(dates) == 1:
+            return None  # A single date we could not turn into a range.
+        check_in, check_out = dates or (None, None)
+        return "specific_availability", {
+            "room_number": room_number,
+            "check_in_date": check_in.strftime('%Y-%m-%d') if check_in else None,
+            "check_out_date": check_out.strftime('%Y-%m-%d') if check_out else None,
+        }
+
+    if not wants_availability and not room_number and not dates and GENERAL_RE.search(message):
+        return "general_question", {}
+    return None
+
+
+def _unparsed_temporal(message):
+    remaining = message.replace("24/7", " ")
+    for pattern in (DATE_RE, RELATIVE_RE, NIGHTS_RE):
+        remaining = pattern.sub("\0", remaining)  # Parsed spans become a NUL, which no cue matches.
+    remaining = re.sub(r"\bthe\s+\0", "\0", remaining, flags=re.I)  # "from the 3rd of August"
+    return UNPARSED_TEMPORAL_RE.search(remaining) is not None
+
+
+def _extract_dates(message, today):
+    """Returns [] or [check_in, check_out]; a lone check-in date is returned as a one-item list.
+    None when a date was mentioned but could not be read."""
+    message = message.replace("24/7", "")
+    found = []
+    for match in DATE_RE.finditer(message):
+        parsed = _parse(match.group(0), today)
+        if parsed is None:
+            return None
+        found.append((match.start(), parsed))
+    for match in RELATIVE_RE.finditer(message):
+        found.extend((match.start(), day) for day in _relative(match.group(1).lower(), today))
+    found.sort(key=lambda item: item[0])
+    dates = [day for _, day in found]
+
+    nights = NIGHTS_RE.search(message)
+    if len(dates) == 1 and nights:
+        count = nights.group(1).lower()
+        dates.append(dates[0] + timedelta(days=int(_WORD_NUMBERS.get(count, count))))
+
+    if len(dates) > 2 or (len(dates) == 2 and dates[0] >= dates[1]):
+        return [dates[0]]  # Not a clean range; let the LLM decide.
+    return dates
+
+
+def _parse(text, today):
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text, flags=re.I).replace(" of ", " ")
+    try:
+        parsed = parse_date(cleaned, default=today)
+    except (ValueError, OverflowError):
+        return None
+    if not re.search(r"\d{4}", text) and parsed < today:
+        try:
+            parsed = parsed.replace(year=parsed.year + 1)  # "July 4" asked in August means next year.
+        except ValueError:
+            return None  # "Feb 29" after the leap day: next year has no such date.
+    return parsed
+
+
+def _relative(word, today):
+    if word in ("today", "tonight"):
+        return [today]
+    if word == "tomorrow":
+        return [today + timedelta(days=1)]
+    weekday = today.weekday()
+    if word == "this weekend" and weekday >= 5:
+        return [today, today + timedelta(days=7 - weekday)]
+    friday = today + timedelta(days=(4 - weekday) % 7)
+    if word == "next weekend" and weekday == 4:
+        friday += timedelta(days=7)
+    return [friday, friday + timedelta(days=2)]
@@ -0,0 +1,125 @@
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Pooled LLM Client ---
+# One shared requests.Session per process, so TLS connections to the inference
+# endpoint are reused across chat requests. Concurrency is bounded by a
+# semaphore, every call has a timeout, and 429/5xx responses are retried with
+# exponential backoff (honouring Retry-After when the server sends it).
+# Connection failures are retried too, but a read timeout is not: the server
+# may still be generating, and a retry would wait the full timeout again. All
+# attempts of one call share a deadline (call_timeout), so a call holds its
+# thread and concurrency slot for at most that long.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMClient:
+    def __init__(self, api_url, model, max_concurrency=8, connect_timeout=3.05, read_timeout=30.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, acquire_timeout=10.0, call_timeout=None):
+        self.api_url = api_url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.call_timeout = call_timeout or connect_timeout + read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def complete(self, token, prompt, temperature=0.7, max_tokens=250):
+        """Single-shot completion. Returns the message content."""
+        payload = self._payload(prompt, temperature, max_tokens)
+        self._acquire()
+        try:
+            response = self._post(token, payload, stream=False)
+            try:
+                return response.json()['choices'][0]['message']['content']
+            except (ValueError, KeyError, IndexError) as e:
+                raise LLMError(f"Malformed completion response: {e}")
+        finally:
+            self._slots.release()
+
+    def stream(self, token, prompt, temperature=0.7, max_tokens=250):
+        """Generator of content deltas from a server-sent-events completion."""
+        payload = self._payload(prompt, temperature, max_tokens)
+        payload["stream"] = True
+        self._acquire()
+        try:
+            response = self._post(token, payload, stream=True)
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        choices = json.loads(data).get("choices") or []
+                    except ValueError:
+                        continue
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+        finally:
+            self._slots.release()
+
+    def _payload(self, prompt, temperature, max_tokens):
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature, "max_tokens": max_tokens}
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise LLMError("Too many concurrent LLM requests.")
+
+    def _post(self, token, payload, stream):
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        deadline = time.monotonic() + self.call_timeout
+        connect_timeout, read_timeout = self.timeout
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            remaining = deadline - time.monotonic()
+            timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+            try:
+                response = self.session.post(self.api_url, headers=headers, json=payload, timeout=timeout, stream=stream)
+            except requests.exceptions.ReadTimeout as e:
+                raise LLMError(f"LLM API timed out: {e}")
+            except requests.exceptions.ConnectionError as e:  # Includes ConnectTimeout.
+                delay = self._backoff(attempt)
+                if last_attempt or time.monotonic() + delay >= deadline:
+                    raise LLMError(f"LLM API unreachable: {e}")
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 200:
+                return response
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                delay = self._retry_after(response) or self._backoff(attempt)
+                if time.monotonic() + delay < deadline:
+                    response.close()
+                    time.sleep(delay)
+                    continue
+            raise LLMError(f"LLM API failed with status {response.status_code}: {response.text}")
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, response):
+        try:
+            return min(self.backoff_max, float(response.headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,230 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# --- In-Process Metrics ---
+# Counters and latency histograms rendered in the Prometheus text format on
+# /metrics. There is one process-wide registry. Each metric is declared once,
+# by the module that records it; a metric recorded by several modules (like
+# MONGO_QUERY_SECONDS below) is declared here and imported. Declaring a name
+# again returns the registered metric only when the kind and label names
+# match, and raises ValueError otherwise. Recording is a dict lookup plus a
+# bisect under a per-metric lock, cheap enough to leave on in production.
+
+# Seconds; covers in-memory lookups (sub-millisecond) up to slow LLM round trips.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {key: value for key, value in self._values.items()}
+
+    @staticmethod
+    def merge(into, series):
+        for key, value in series.items():
+            into[key] = into.get(key, 0) + value
+
+    def render(self, series=None):
+        values = sorted((self.snapshot() if series is None else series).items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in values]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}         # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    @staticmethod
+    def merge(into, series):
+        for key, values in series.items():
+            current = into.get(key)
+            into[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+
+    def render(self, series=None):
+        series = sorted((self.snapshot() if series is None else series).items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {values[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, cls, name, help_text, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+            elif metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with labels {metric.labelnames}.")
+            return metric
+
+    def snapshot(self):
+        """{name: [(labelvalues, value), ...]} of every metric, in a JSON-friendly shape."""
+        with self._lock:
+            registered = list(self._metrics.items())
+        return {name: [[list(key), value] for key, value in metric.snapshot().items()] for name, metric in registered}
+
+    def render(self, snapshots=()):
+        """Text exposition of this registry, with the series of other processes' snapshots summed in."""
+        with self._lock:
+            registered = sorted(self._metrics.items())
+        lines = []
+        for name, metric in registered:
+            series = metric.snapshot()
+            for snapshot in snapshots:
+                metric.merge(series, {tuple(key): value for key, value in snapshot.get(name, ())})
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(series))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name, help_text, labelnames=()):
+    return REGISTRY.register(Counter, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def render():
+    if _shared_dir is None:
+        return REGISTRY.render()
+    _write_snapshot()
+    return REGISTRY.render(_read_other_snapshots())
+
+
+# --- Sharing Across Worker Processes ---
+# Under serve.py each gunicorn worker has its own registry, and a scrape only
+# reaches whichever worker accepts it. With share_across_processes(), every
+# worker writes its snapshot to metrics.<pid>.json in a shared directory every
+# few seconds (the interval), and /metrics renders the sum over all files. The
+# scraped worker writes its own snapshot first, but the other workers' files
+# can be up to one interval old, so the sum lags recent traffic by that much
+# (METRICS_SNAPSHOT_INTERVAL, 5 s by default). Files of exited
+# workers are kept, so their counts still contribute and counters never go
+# backwards; serve.py empties the directory when the server starts.
+
+_shared_dir = None
+
+
+def share_across_processes(directory, interval=5.0):
+    global _shared_dir
+    if _shared_dir is not None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _shared_dir = directory
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                _write_snapshot()
+            except OSError as e:
+                print(f"[Metrics] Could not write snapshot: {e}")
+
+    threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+
+
+def _snapshot_path(pid):
+    return os.path.join(_shared_dir, f"metrics.{pid}.json")
+
+
+def _write_snapshot():
+    path = _snapshot_path(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def _read_other_snapshots():
+    own = _snapshot_path(os.getpid())
+    snapshots = []
+    for path in glob.glob(os.path.join(glob.escape(_shared_dir), "metrics.*.json")):
+        if path == own:
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Removed or being replaced; the next scrape picks it up.
+    return snapshots
+
+
+def clear_shared_dir(directory):
+    """Removes the snapshots of a previous server run."""
+    for path in glob.glob(os.path.join(glob.escape(directory), "metrics.*.json*")):
+        os.remove(path)
+
+
+# Shared by every module that queries MongoDB; import it rather than re-declaring it.
+MONGO_QUERY_SECONDS = histogram("ai_service_mongo_query_seconds", "MongoDB query time, including cursor iteration.", ["operation"])
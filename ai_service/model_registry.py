@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import runtime_model
+from forecast import ForecastTable
+
+# --- Versioned Model Registry ---
+# Layout under the registry directory:
+#   <version>/booking_model.pkl   the fitted scikit-learn model
+#   <version>/runtime_model.json  its coefficients in runtime_model's format; what the service loads
+#   <version>/metadata.json       training date, row count, metrics, ...
+#   CURRENT                       name of the live version
+# publish() writes a version directory and then flips CURRENT with os.replace,
+# so readers only ever see a complete artifact. The serving side polls CURRENT
+# and swaps a single reference to the newly loaded model; in-flight requests
+# keep the model object they already hold. joblib (and with it scikit-learn)
+# is only imported for artifacts that predate the runtime format.
+
+MODEL_FILENAME = "booking_model.pkl"
+RUNTIME_FILENAME = "runtime_model.json"
+METADATA_FILENAME = "metadata.json"
+CURRENT_FILENAME = "CURRENT"
+
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _runtime_path(legacy_path):
+    """booking_model.pkl -> booking_model.json"""
+    return os.path.splitext(legacy_path)[0] + ".json"
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_estimator(path):
+    import joblib
+    return runtime_model.from_estimator(joblib.load(path))
+
+
+def publish(model, metadata, registry_dir, legacy_path=None, keep_versions=5):
+    """Stores a new model version and makes it the live one. Returns the version name."""
+    import joblib
+    runtime = runtime_model.from_estimator(model)
+    os.makedirs(registry_dir, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    metadata = {**metadata, "version": version, "published_at": datetime.now(timezone.utc).isoformat()}
+
+    staging = tempfile.mkdtemp(dir=registry_dir, prefix=".staging-")
+    joblib.dump(model, os.path.join(staging, MODEL_FILENAME))
+    with open(os.path.join(staging, RUNTIME_FILENAME), "wb") as f:
+        runtime.save(f)
+    with open(os.path.join(staging, METADATA_FILENAME), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(staging, os.path.join(registry_dir, version))
+
+    _atomic_write(os.path.join(registry_dir, CURRENT_FILENAME), lambda f: f.write(version.encode()))
+    if legacy_path:
+        # Keep the flat booking_model.pkl in sync for anything still loading it directly.
+        _atomic_write(legacy_path, lambda f: joblib.dump(model, f))
+        # Tagged with the pickle's hash so a pickle replaced by other means is never shadowed by a stale export.
+        source_sha256 = _sha256(legacy_path)
+        _atomic_write(_runtime_path(legacy_path), lambda f: runtime.save(f, source_sha256=source_sha256))
+    _prune(registry_dir, keep_versions)
+    return version
+
+
+def list_versions(registry_dir):
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(name for name in os.listdir(registry_dir)
+                  if not name.startswith(".") and os.path.isdir(os.path.join(registry_dir, name)))
+
+
+def _prune(registry_dir, keep_versions):
+    for version in list_versions(registry_dir)[:-keep_versions]:
+        shutil.rmtree(os.path.join(registry_dir, version), ignore_errors=True)
+
+
+class ActiveModel:
+    """Immutable bundle of everything a request needs from one model version."""
+    __slots__ = ("version", "model", "forecast", "metadata", "loaded_at", "load_seconds")
+
+    def __init__(self, version, model, metadata, load_seconds):
+        self.version = version
+        self.model = model
+        self.forecast = ForecastTable(model)
+        self.metadata = metadata
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.load_seconds = load_seconds
+
+
+class ModelRegistry:
+    def __init__(self, registry_dir, legacy_path=None, poll_interval=5.0):
+        self.registry_dir = registry_dir
+        self.legacy_path = legacy_path
+        self.poll_interval = poll_interval
+        self.active = None
+        self.last_error = None
+        self.reloads = 0
+        self._seen = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _source(self):
+        """(kind, identity) of what should be live: the CURRENT version, else the legacy pickle's mtime."""
+        current_path = os.path.join(self.registry_dir, CURRENT_FILENAME)
+        try:
+            with open(current_path) as f:
+                return "registry", f.read().strip()
+        except FileNotFoundError:
+            pass
+        if self.legacy_path:
+            pickle_sha256 = _sha256(self.legacy_path) if os.path.exists(self.legacy_path) else None
+            try:
+                with open(_runtime_path(self.legacy_path)) as f:
+                    exported_from = json.load(f).get("source_sha256")
+            except (FileNotFoundError, ValueError):
+                exported_from = None
+            if exported_from is not None and exported_from == pickle_sha256:
+                return "legacy-runtime", pickle_sha256
+            if pickle_sha256 is not None:
+                return "legacy", pickle_sha256
+        return None, None
+
+    def load(self):
+        """Loads whatever is live if it differs from the active model. Returns True on a swap."""
+        kind, identity = self._source()
+        if kind is None:
+            self.last_error = f"No model found in {self.registry_dir} or {self.legacy_path}."
+            return False
+        if (kind, identity) == self._seen:
+            return False
+
+        start = time.perf_counter()
+        try:
+            if kind == "registry":
+                version_dir = os.path.join(self.registry_dir, identity)
+                runtime_path = os.path.join(version_dir, RUNTIME_FILENAME)
+                if os.path.exists(runtime_path):
+                    model = runtime_model.load(runtime_path)
+                else:
+                    model = _load_estimator(os.path.join(version_dir, MODEL_FILENAME))
+                with open(os.path.join(version_dir, METADATA_FILENAME)) as f:
+                    metadata = json.load(f)
+                version = identity
+            elif kind == "legacy-runtime":
+                model = runtime_model.load(_runtime_path(self.legacy_path))
+                metadata, version = {}, "legacy"
+            else:
+                model = _load_estimator(self.legacy_path)
+                metadata, version = {}, "legacy"
+            candidate = ActiveModel(version, model, metadata, time.perf_counter() - start)
+        except Exception as e:
+            # Keep serving the previous model; a half-written or broken artifact must not take /predict down.
+            self.last_error = f"Failed to load model {identity}: {e}"
+            print(f"[Model Registry] {self.last_error}")
+            self._seen = (kind, identity)
+            return False
+
+        self.active = candidate  # Single reference swap; readers never see a partial model.
+        self._seen = (kind, identity)
+        self.last_error = None
+        self.reloads += 1
+        print(f"[Model Registry] Serving model version {version} (loaded in {candidate.load_seconds * 1000:.1f} ms).")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.load()
+            except Exception as e:
+                print(f"[Model Registry] Watch error: {e}")
+
+    def status(self):
+        active = self.active
+        return {
+            "active_version": active.version if active else None,
+            "loaded_at": active.loaded_at if active else None,
+            "load_seconds": round(active.load_seconds, 4) if active else None,
+            "metadata": active.metadata if active else None,
+            "available_versions": list_versions(self.registry_dir),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,243 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# --- Occupancy Calendar ---
+# A rooms x days int8 matrix of Active bookings (1 = room booked that night),
+# built from the availability index and kept current by its booking events.
+# Analytics for any date range are array reductions over a slice of the matrix:
+# a one-hot room-type matrix collapses rooms into types, and np.add.reduceat
+# folds days into weeks or months.
+# A booking occupies the nights from its check-in day up to, but excluding,
+# its check-out day. Same-day stays count as one night.
+
+GRANULARITIES = ("day", "week", "month")
+PAST_DAYS, FUTURE_DAYS = 366, 731
+
+
+def _day(value):
+    """Calendar day of a datetime/date as a NumPy datetime64[D]."""
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+def month_bounds(year, month):
+    """First day of the month and first day of the next one."""
+    start = date(int(year), int(month), 1)
+    return _day(start), _day((start + timedelta(days=32)).replace(day=1))
+
+
+class OccupancyCalendar:
+    def __init__(self, availability_index):
+        self.availability_index = availability_index
+        self._lock = threading.Lock()
+        self._rooms_version = None
+        self.origin = None
+        self.grid = np.zeros((0, 0), dtype=np.int8)
+        self.room_ids = []
+        self.room_types = np.array([], dtype=object)
+        self.type_names = []
+        self.type_codes = np.array([], dtype=np.int64)
+        self._row_of = {}
+        self._spans = {}          # booking_id -> (row, first night, end night) as day offsets
+        self.rebuilds = 0
+        availability_index.subscribe(self._on_change)
+
+    # --- Building ---
+    def rebuild(self):
+        """Full rebuild from the index's rooms and Active booking intervals."""
+        # Held throughout so booking events that race the snapshot are applied to the new grid.
+        with self._lock:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        index = self.availability_index
+        rooms_version = index.rooms_version
+        rooms = sorted(index.rooms(), key=lambda r: str(r.get("roomNumber")))
+        intervals = index.room_intervals()
+
+        today = np.datetime64(date.today(), "D")
+        first, last = today - PAST_DAYS, today + FUTURE_DAYS
+        for ivs in intervals.values():
+            for check_in, check_out, _ in ivs:
+                first, last = min(first, _day(check_in)), max(last, _day(check_out) + 1)
+
+        room_ids = [r["_id"] for r in rooms]
+        row_of = {room_id: i for i, room_id in enumerate(room_ids)}
+        grid = np.zeros((len(room_ids), int((last - first).astype(int))), dtype=np.int8)
+        spans = {}
+        for room_id, ivs in intervals.items():
+            row = row_of.get(room_id)
+            if row is None:
+                continue
+            for check_in, check_out, booking_id in ivs:
+                start, end = self._offsets(first, check_in, check_out)
+                grid[row, start:end] += 1
+                spans[booking_id] = (row, start, end)
+
+        room_types = np.array([r.get("type") or "Unknown" for r in rooms], dtype=object)
+        type_names = sorted(set(room_types))
+        self.origin = first
+        self.grid = grid
+        self.room_ids = room_ids
+        self._row_of = row_of
+        self._spans = spans
+        self.room_types = room_types
+        self.type_names = type_names
+        self.type_codes = np.array([type_names.index(t) for t in room_types], dtype=np.int64)
+        self._rooms_version = rooms_version
+        self.rebuilds += 1
+
+    def ensure_current(self):
+        index = self.availability_index
+        if not index.ready:
+            return False
+        if self.origin is None or self._rooms_version != index.rooms_version:
+            self.rebuild()
+        return True
+
+    @staticmethod
+    def _offsets(origin, check_in, check_out):
+        start = int((_day(check_in) - origin).astype(int))
+        end = int((_day(check_out) - origin).astype(int))
+        return start, max(end, start + 1)
+
+    # --- Incremental Updates ---
+    def _on_change(self, event, booking_id, booking):
+        if event == "reload":
+            self.rebuild()
+            return
+        with self._lock:
+            if self.origin is None:
+                return
+            span = self._spans.pop(booking_id, None)
+            if span is not None:
+                row, start, end = span
+                self.grid[row, start:end] -= 1
+            if booking is None or booking.get("status") != "Active":
+                return
+            row = self._row_of.get(booking["room"])
+            if row is None:
+                # Room not known yet; the rebuild on the next rooms_version change picks it up.
+                return
+            start, end = self._offsets(self.origin, booking["checkInDate"], booking["checkOutDate"])
+            start, end = self._grow_locked(start, end)
+            self.grid[row, start:end] += 1
+            self._spans[booking_id] = (row, start, end)
+
+    def _grow_locked(self, start, end):
+        """Pads the grid so [start, end) fits, shifting stored offsets if the origin moves back."""
+        before = max(0, -start)
+        after = max(0, end - self.grid.shape[1])
+        if before or after:
+            self.grid = np.pad(self.grid, ((0, 0), (before, after)))
+            if before:
+                self.origin = self.origin - before
+                self._spans = {b: (row, s + before, e + before) for b, (row, s, e) in self._spans.items()}
+        return start + before, end + before
+
+    # --- Queries ---
+    def occupied(self, start_day, end_day):
+        """Boolean rooms x days occupancy for [start_day, end_day); days outside the grid are free."""
+        with self._lock:
+            grid, origin = self.grid, self.origin
+            s = int((start_day - origin).astype(int))
+            e = int((end_day - origin).astype(int))
+            out = np.zeros((grid.shape[0], max(0, e - s)), dtype=bool)
+            lo, hi = max(s, 0), min(e, grid.shape[1])
+            if lo < hi:
+                out[:, lo - s:hi - s] = grid[:, lo:hi] > 0
+            return out, self.type_codes, list(self.type_names)
+
+    def booked_rooms(self, check_in, check_out):
+        """(room ids, bool per room) marking rooms with at least one booked night of the stay [check_in, check_out)."""
+        with self._lock:
+            grid, room_ids = self.grid, self.room_ids
+            s, e = self._offsets(self.origin, check_in, check_out)
+            lo, hi = max(s, 0), min(e, grid.shape[1])
+            booked = grid[:, lo:hi].any(axis=1) if lo < hi else np.zeros(grid.shape[0], dtype=bool)
+        return room_ids, booked
+
+    def bookings_overlapping(self, start_day, end_day):
+        """Number of Active bookings with at least one night in [start_day, end_day)."""
+        with self._lock:
+            if not self._spans:
+                return 0
+            s = int((start_day - self.origin).astype(int))
+            e = int((end_day - self.origin).astype(int))
+            spans = np.array([(start, end) for _, start, end in self._spans.values()], dtype=np.int64)
+        return int(np.count_nonzero((spans[:, 0] < e) & (spans[:, 1] > s)))
+
+    def booked_by_type(self, start_day, end_day, room_type=None):
+        """(type names, rooms per type, types x days booked-room counts) for [start_day, end_day)."""
+        occupied, type_codes, type_names = self.occupied(start_day, end_day)
+        if room_type is not None:
+            keep = type_codes == (type_names.index(room_type) if room_type in type_names else -1)
+            occupied, type_codes = occupied[keep], np.zeros(int(keep.sum()), dtype=np.int64)
+            type_names = [room_type]
+        one_hot = np.zeros((len(type_names), len(type_codes)), dtype=np.int32)
+        one_hot[type_codes, np.arange(len(type_codes))] = 1
+        return type_names, one_hot.sum(axis=1), one_hot @ occupied.astype(np.int32)
+
+    def summary(self, start, end, granularity="day", room_type=None):
+        """Occupancy rate, booked room-nights and free capacity per bucket and room type for [start, end)."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if not self.ensure_current():
+            return None
+        start_day, end_day = _day(start), _day(end)
+        if end_day <= start_day:
+            raise ValueError("end must be after start")
+
+        type_names, rooms_per_type, booked_by_day = self.booked_by_type(start_day, end_day, room_type)
+        days = start_day + np.arange(booked_by_day.shape[1])
+        bucket_starts = self._bucket_starts(days, granularity)
+        booked = np.add.reduceat(booked_by_day, bucket_starts, axis=1)
+        nights = np.diff(np.append(bucket_starts, len(days)))
+        capacity = rooms_per_type[:, None] * nights[None, :]
+
+        labels = [str(d) for d in days[bucket_starts]]
+        return {
+            "start": str(start_day),
+            "end": str(end_day),
+            "granularity": granularity,
+            "total_rooms": int(rooms_per_type.sum()),
+            "totals": self._stats(booked.sum(), capacity.sum()),
+            "buckets": [dict(start=label, nights=int(n), **self._stats(b, c))
+                        for label, n, b, c in zip(labels, nights, booked.sum(axis=0), capacity.sum(axis=0))],
+            "by_room_type": {
+                name: {
+                    "rooms": int(rooms_per_type[i]),
+                    "totals": self._stats(booked[i].sum(), capacity[i].sum()),
+                    "buckets": [dict(start=label, **self._stats(b, c)) for label, b, c in zip(labels, booked[i], capacity[i])],
+                }
+                for i, name in enumerate(type_names)
+            },
+        }
+
+    @staticmethod
+    def _bucket_starts(days, granularity):
+        if granularity == "day":
+            return np.arange(len(days))
+        if granularity == "week":
+            # 1970-01-01 was a Thursday, so (epoch day + 3) % 7 == 0 on Mondays.
+            key = (days.astype(np.int64) + 3) // 7
+        else:
+            key = days.astype("datetime64[M]").astype(np.int64)
+        return np.concatenate(([0], np.flatnonzero(np.diff(key)) + 1))
+
+    @staticmethod
+    def _stats(booked, capacity):
+        booked, capacity = int(booked), int(capacity)
+        return {
+            "booked_room_nights": booked,
+            "free_room_nights": capacity - booked,
+            "capacity_room_nights": capacity,
+            "occupancy_rate": round(booked / capacity, 4) if capacity else 0.0,
+        }
+
+    def stats(self):
+        return {"rooms": self.grid.shape[0], "days": self.grid.shape[1], "origin": str(self.origin),
+                "bookings": len(self._spans), "rebuilds": self.rebuilds}
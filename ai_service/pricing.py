@@ -0,0 +1,150 @@
+import threading
+from datetime import date
+
+import numpy as np
+
+# --- Dynamic Pricing Engine ---
+# Computes a forward price grid (room types x days) in one vectorized pass.
+# Each day combines three inputs:
+#   demand     the model's forecast for that day's month over the forecast's own
+#              monthly average (per room type when the model version publishes it)
+#   occupancy  on-the-books occupancy of that room type from the occupancy calendar
+#   base price the mean Room.price of the type
+# The demand and occupancy thresholds are the ones the dashboard's single-month
+# price suggestion has always used. Grids are cached per (start, days, room type)
+# and dropped when a booking or room changes or a new model version goes live.
+
+DEMAND_STEPS = ((1.25, 10), (1.1, 5))
+LOW_DEMAND, LOW_DEMAND_SCORE = 0.8, -5
+OCCUPANCY_STEPS = ((0.6, 10), (0.4, 5))
+# (minimum score, percent, reason), checked top to bottom; scores at or below -5 get the discount.
+SUGGESTIONS = (
+    (15, 20, "Extremely high demand and booking pace. Capitalize on this peak."),
+    (10, 15, "Both predicted demand and current bookings are strong."),
+    (5, 10, "Predicted demand or booking pace is higher than average."),
+)
+DISCOUNT = (-5, -10, "Demand is low. A promotion could attract more guests.")
+NEUTRAL = (0, "Demand and booking pace are within the normal range.")
+MAX_CACHED_GRIDS = 32
+
+
+def suggestion_score(demand_factor, occupancy_factor):
+    """Vectorized version of the dashboard's demand + booking-pace score."""
+    demand_factor = np.asarray(demand_factor, dtype=float)
+    occupancy_factor = np.asarray(occupancy_factor, dtype=float)
+    demand = np.select([demand_factor > t for t, _ in DEMAND_STEPS], [s for _, s in DEMAND_STEPS],
+                       default=np.where(demand_factor < LOW_DEMAND, LOW_DEMAND_SCORE, 0))
+    occupancy = np.select([occupancy_factor > t for t, _ in OCCUPANCY_STEPS], [s for _, s in OCCUPANCY_STEPS], default=0)
+    return demand + occupancy
+
+
+def suggestion_percent(score):
+    score = np.asarray(score)
+    conditions = [score >= minimum for minimum, _, _ in SUGGESTIONS] + [score <= DISCOUNT[0]]
+    return np.select(conditions, [p for _, p, _ in SUGGESTIONS] + [DISCOUNT[1]], default=NEUTRAL[0])
+
+
+def suggestion(score):
+    """(percent, reason) for one scalar score."""
+    for minimum, percent, reason in SUGGESTIONS:
+        if score >= minimum:
+            return percent, reason
+    if score <= DISCOUNT[0]:
+        return DISCOUNT[1], DISCOUNT[2]
+    return NEUTRAL
+
+
+def baseline_monthly_bookings(active_model):
+    """Average monthly bookings of the live model: published by train.py, else the mean of its 12-month forecast."""
+    if active_model is None:
+        return None
+    published = (active_model.metadata or {}).get("average_monthly_bookings")
+    if published:
+        return float(published)
+    mean = float(active_model.forecast.values.mean())
+    return mean if mean > 0 else None
+
+
+class PricingEngine:
+    def __init__(self, occupancy_calendar, availability_index, model_fn):
+        self.occupancy_calendar = occupancy_calendar
+        self.availability_index = availability_index
+        self.model_fn = model_fn
+        self._lock = threading.Lock()
+        self._grids = {}
+        self._key = None
+        self.hits = 0
+        self.builds = 0
+
+    def grid(self, start=None, days=365, room_type=None):
+        """Price grid for `days` days from `start` (default today); None until bookings and the model are loaded."""
+        active = self.model_fn()
+        if active is None or not self.occupancy_calendar.ensure_current():
+            return None
+        start_day = np.datetime64(start or date.today(), "D")
+        # Keyed on the ActiveModel object itself: legacy sources all report version "legacy",
+        # but every reload creates a new one. Holding it also keeps its identity from being reused.
+        key = (self.availability_index.version, active)
+        with self._lock:
+            if key != self._key:
+                self._grids, self._key = {}, key
+            cached = self._grids.get((start_day, days, room_type))
+            if cached is not None:
+                self.hits += 1
+                return cached
+            result = self._build(active, start_day, int(days), room_type)
+            if len(self._grids) >= MAX_CACHED_GRIDS:
+                self._grids.pop(next(iter(self._grids)))
+            self._grids[(start_day, days, room_type)] = result
+            self.builds += 1
+            return result
+
+    def _build(self, active, start_day, days, room_type):
+        end_day = start_day + days
+        type_names, rooms_per_type, booked = self.occupancy_calendar.booked_by_type(start_day, end_day, room_type)
+        dates = start_day + np.arange(days)
+        month_index = dates.astype("datetime64[M]").astype(np.int64) % 12
+
+        demand = self._demand_by_type(active, type_names)[:, month_index]
+        occupancy = np.divide(booked, rooms_per_type[:, None], out=np.zeros(booked.shape), where=rooms_per_type[:, None] > 0)
+        percent = suggestion_percent(suggestion_score(demand, occupancy))
+        base = self._base_prices(type_names)
+        prices = np.round(base[:, None] * (1 + percent / 100.0), 2)
+
+        return {
+            "start": str(start_day),
+            "days": days,
+            "model_version": active.version,
+            "dates": [str(d) for d in dates],
+            "room_types": {
+                name: {
+                    "rooms": int(rooms_per_type[i]),
+                    "base_price": round(float(base[i]), 2),
+                    "prices": prices[i].tolist(),
+                    "adjustment_percent": percent[i].tolist(),
+                    "demand_factor": np.round(demand[i], 3).tolist(),
+                    "occupancy": np.round(occupancy[i], 3).tolist(),
+                }
+                for i, name in enumerate(type_names)
+            },
+        }
+
+    @staticmethod
+    def _demand_by_type(active, type_names):
+        """types x 12 ratio of each month's forecast to the forecast's own monthly mean."""
+        overall = active.forecast.values / max(active.forecast.values.mean(), 1e-9)
+        by_type = (active.metadata or {}).get("by_room_type") or {}
+        rows = []
+        for name in type_names:
+            monthly = np.asarray((by_type.get(name) or {}).get("monthly_forecast") or [], dtype=float)
+            rows.append(monthly / monthly.mean() if len(monthly) == 12 and monthly.mean() > 0 else overall)
+        return np.vstack(rows) if rows else np.zeros((0, 12))
+
+    def _base_prices(self, type_names):
+        rooms = self.availability_index.rooms()
+        types = np.array([r.get("type") or "Unknown" for r in rooms], dtype=object)
+        prices = np.array([float(r.get("price") or 0) for r in rooms])
+        return np.array([prices[types == name].mean() if (types == name).any() else 0.0 for name in type_names])
+
+    def stats(self):
+        return {"cached_grids": len(self._grids), "hits": self.hits, "builds": self.builds}
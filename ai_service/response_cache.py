@@ -0,0 +1,107 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# --- Concierge Response Cache ---
+# Maps (intent, slots, tool-result fingerprint) to a generated reply so that a
+# repeated question over unchanged data skips the generation LLM call.
+# General questions have no slots, so their normalized text acts as the slot;
+# near-duplicates of a cached general question are matched by character-trigram
+# similarity within the same tool-result fingerprint (off unless a threshold is set).
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", text.lower())).strip()
+
+
+def fingerprint(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, max_age=600.0, similarity_threshold=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()   # key -> (reply, stored_at, trigrams)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, intent, params, tool_result, message):
+        if intent == "specific_availability":
+            slots, question = tuple(sorted((k, str(v).strip().upper()) for k, v in (params or {}).items() if v)), ""
+        else:
+            slots, question = (), normalize(message)
+        return (intent, slots, fingerprint(tool_result), question)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.max_age:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            reply = self._near_duplicate(key, now) if key[3] and self.similarity_threshold else None
+            if reply is not None:
+                self.near_hits += 1
+                return reply
+            self.misses += 1
+            return None
+
+    def _near_duplicate(self, key, now):
+        grams = _trigrams(key[3])
+        best, best_score = None, self.similarity_threshold
+        for other, (reply, stored_at, other_grams) in self._entries.items():
+            if other[:3] != key[:3] or now - stored_at >= self.max_age:
+                continue
+            score = len(grams & other_grams) / len(grams | other_grams)
+            if score >= best_score:
+                best, best_score = other, score
+        if best is None:
+            return None
+        self._entries.move_to_end(best)
+        return self._entries[best][0]
+
+    def put(self, key, reply):
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic(), _trigrams(key[3]) if key[3] else frozenset())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *_):
+        """Drops every entry; signature fits AvailabilityIndex.subscribe callbacks."""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
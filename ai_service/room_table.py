@@ -0,0 +1,80 @@
+import numpy as np
+
+# --- Columnar Room Table ---
+# Room attributes used by /smart-assign, parsed once into NumPy columns so a
+# request is scored with a handful of array expressions instead of a Python
+# loop that re-parses roomNumber strings.
+# The floor is the first character of roomNumber (numeric floors only), and
+# rooms ending in '01' are treated as next to the elevator.
+
+HIGH_FLOOR, LOW_FLOOR = 3, 2
+
+
+class RoomTable:
+    def __init__(self, rooms):
+        rooms = list(rooms)
+        self.ids = np.array([str(r['_id']) for r in rooms], dtype=object)
+        self.numbers = np.array([str(r.get('roomNumber', '')) for r in rooms], dtype=object)
+        first_chars = [number[:1] for number in self.numbers]
+        self.floor = np.array([int(c) if c.isdigit() else -1 for c in first_chars], dtype=np.int16)
+        # Non-numeric first characters still count as a "floor" for the occupancy spread, as before.
+        floor_keys = sorted(set(first_chars))
+        self.floor_key = np.array([floor_keys.index(c) for c in first_chars], dtype=np.int16)
+        self._floor_keys = {c: i for i, c in enumerate(floor_keys)}
+        self.near_elevator = np.array([number.endswith('01') for number in self.numbers], dtype=bool)
+        self.is_available = np.array([bool(r.get('isAvailable', True)) for r in rooms], dtype=bool)
+        self.types = np.array([r.get('type') for r in rooms], dtype=object)
+        self.row_of = {room_id: i for i, room_id in enumerate(self.ids)}
+        self._positions = (None, None)  # (room id ordering, this table's rows' positions in it)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, room_ids):
+        """Row positions of the given ids, in request order; unknown ids are skipped."""
+        return np.array([self.row_of[str(i)] for i in room_ids if str(i) in self.row_of], dtype=np.int64)
+
+    def align(self, room_ids, values, fill=False):
+        """Per-row values reordered from another ordering of room ids, `fill` for rooms absent from it.
+        The position lookup is cached for the last ordering seen, so repeated calls are pure array indexing."""
+        source, positions = self._positions
+        if source is not room_ids:
+            position_of = {str(room_id): i for i, room_id in enumerate(room_ids)}
+            positions = np.array([position_of.get(room_id, -1) for room_id in self.ids], dtype=np.int64)
+            self._positions = (room_ids, positions)
+        return np.append(values, fill)[positions]  # -1 picks the appended fill value.
+
+    def occupied_floor_mask(self, occupied_rows):
+        """Boolean per floor key: True if any of occupied_rows sits on that floor."""
+        mask = np.zeros(len(self._floor_keys), dtype=bool)
+        mask[self.floor_key[occupied_rows]] = True
+        return mask
+
+    def floor_mask_from_numbers(self, room_numbers):
+        mask = np.zeros(len(self._floor_keys), dtype=bool)
+        for number in room_numbers:
+            key = self._floor_keys.get(str(number)[:1])
+            if key is not None:
+                mask[key] = True
+        return mask
+
+    def score(self, rows, occupied_floors, preferences=None):
+        """Vectorized smart-assign score for the candidate rows."""
+        floor = self.floor[rows]
+        scores = np.where(occupied_floors[self.floor_key[rows]], 5, 0) + np.maximum(floor, 0)
+        preferences = preferences or {}
+        if preferences.get('preferredFloor') == 'High Floor':
+            scores = scores + 5 * (floor >= HIGH_FLOOR)
+        elif preferences.get('preferredFloor') == 'Low Floor':
+            scores = scores + 5 * ((floor >= 0) & (floor <= LOW_FLOOR))
+        near = self.near_elevator[rows]
+        if preferences.get('roomLocation') == 'Near Elevator':
+            scores = scores + 3 * near
+        elif preferences.get('roomLocation') == 'Away from Elevator':
+            scores = scores + 3 * ~near
+        return scores
+
+    def top_k(self, rows, scores, k):
+        """Best k candidates; ties keep request order, matching the old max() behaviour."""
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [{'room_id': self.ids[rows[i]], 'roomNumber': self.numbers[rows[i]], 'score': int(scores[i])} for i in order]
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+# --- Runtime Model Format ---
+# The booking model is a linear function of the month, so serving only needs
+# its coefficients. train.py (via model_registry.publish) exports them as a
+# small JSON file next to the pickle:
+#   {"format": "linear-month/1", "encoding": "onehot", "intercept": ..., "coef": [12 values]}
+#   {"format": "linear-month/1", "encoding": "number", "intercept": ..., "coef": [slope]}
+# "onehot" is the seasonal month-of-year model: months outside 1-12 get the
+# intercept alone, like OneHotEncoder(handle_unknown='ignore'). "number" is the
+# older LinearRegression on month_number. RuntimeModel evaluates either with
+# NumPy, so the service never imports pandas, scikit-learn or joblib.
+
+FORMAT = "linear-month/1"
+ENCODINGS = ("onehot", "number")
+
+
+class RuntimeModel:
+    __slots__ = ("encoding", "intercept", "coef")
+
+    def __init__(self, encoding, intercept, coef):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown runtime model encoding '{encoding}'.")
+        self.encoding = encoding
+        self.intercept = float(intercept)
+        self.coef = np.asarray(coef, dtype=float)
+        if encoding == "onehot" and len(self.coef) != 12:
+            raise ValueError("A one-hot month model needs 12 coefficients.")
+
+    def predict(self, months):
+        """Predicted bookings for an array of month numbers."""
+        months = np.asarray(months, dtype=int)
+        if self.encoding == "number":
+            return self.intercept + self.coef[0] * months
+        in_range = (months >= 1) & (months <= 12)
+        return self.intercept + np.where(in_range, self.coef[np.clip(months, 1, 12) - 1], 0.0)
+
+    def to_dict(self):
+        return {"format": FORMAT, "encoding": self.encoding, "intercept": self.intercept, "coef": self.coef.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != FORMAT:
+            raise ValueError(f"Unsupported runtime model format '{data.get('format')}'.")
+        return cls(data["encoding"], data["intercept"], data["coef"])
+
+    def save(self, f, **extra):
+        f.write(json.dumps({**self.to_dict(), **extra}).encode())
+
+
+def load(path):
+    with open(path) as f:
+        return RuntimeModel.from_dict(json.load(f))
+
+
+def from_estimator(model):
+    """Extracts the coefficients of a fitted scikit-learn model of the shapes train.py produces.
+
+    Reads fitted attributes only, so scikit-learn is touched solely through the already-unpickled object."""
+    steps = getattr(model, "named_steps", None)
+    if steps is None:
+        coef = np.ravel(model.coef_)
+        if len(coef) != 1:
+            raise ValueError(f"Expected one month_number coefficient, got {len(coef)}.")
+        return RuntimeModel("number", model.intercept_, coef)
+
+    regressor = steps["regressor"]
+    encoder = steps["month"].named_transformers_["onehot"]
+    categories = [int(c) for c in encoder.categories_[0]]
+    coef = np.zeros(12)
+    for category, value in zip(categories, np.ravel(regressor.coef_)):
+        if 1 <= category <= 12:
+            coef[category - 1] = value
+    return RuntimeModel("onehot", regressor.intercept_, coef)
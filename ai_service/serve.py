@@ -0,0 +1,104 @@
+"""Production entry point: the AI service under gunicorn with preloaded, forked workers.
+
+The master process imports app.py once, which loads the booking model, and
+then forks. Workers share that memory copy-on-write. Each worker then opens
+its own Mongo pool, availability index, LLM session and chat-log shipper in
+post_fork. Slow LLM calls only occupy one of a worker's threads. /ready
+answers 503 until the worker's availability index has loaded.
+
+On SIGTERM a worker flips /ready to 503, stops accepting connections and
+finishes in-flight requests within --graceful-timeout before exiting.
+
+Workers write metric snapshots to METRICS_MULTIPROC_DIR (a fresh temporary
+directory unless set; emptied at startup), so /metrics reports the sum over
+all workers whichever one answers the scrape. The answering worker's own
+counts are current; the others' are as of their last snapshot, so they lag by
+up to METRICS_SNAPSHOT_INTERVAL (default 5 s) and back-to-back scrapes can
+differ slightly. /cache-stats and
+/chat-log/stats stay per worker and include its pid. Chat-log spill files are
+per process as well (chat_log_spill.<pid>.jsonl); a worker adopts the files
+of workers that have exited.
+
+    python serve.py --workers 4 --threads 8 --bind 127.0.0.1:5000
+
+Every option can also be set through the environment (WEB_WORKERS,
+WEB_THREADS, WEB_BIND, WEB_WORKER_CLASS, WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT).
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+
+# Checked by app.py at import: the per-process services are started in post_fork instead.
+os.environ["AI_SERVICE_DEFER_START"] = "1"
+
+
+def post_fork(server, worker):
+    import app as service
+    service.start_services()
+
+
+def post_worker_init(worker):
+    """Chains a readiness flip in front of gunicorn's graceful-exit handler."""
+    import app as service
+    graceful_exit = worker.handle_exit
+
+    def handle_exit(sig, frame):
+        service.begin_drain()
+        graceful_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_exit)
+
+
+class AIServiceApplication(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import app as service
+        return service.app
+
+
+def options_from(args):
+    return {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": args.worker_class,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": 5,
+        "preload_app": True,
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+        "accesslog": "-" if args.access_log else None,
+    }
+
+
+if __name__ == "__main__":
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default=env("WEB_BIND", "127.0.0.1:5000"))
+    parser.add_argument("--workers", type=int, default=int(env("WEB_WORKERS", multiprocessing.cpu_count())))
+    parser.add_argument("--threads", type=int, default=int(env("WEB_THREADS", 8)), help="Request threads per worker (gthread).")
+    parser.add_argument("--worker-class", default=env("WEB_WORKER_CLASS", "gthread"), help="gthread (threads per worker) or sync.")
+    parser.add_argument("--timeout", type=int, default=int(env("WEB_TIMEOUT", 120)), help="Seconds before a stuck worker is restarted.")
+    parser.add_argument("--graceful-timeout", type=int, default=int(env("WEB_GRACEFUL_TIMEOUT", 30)), help="Seconds to drain in-flight requests on shutdown.")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+    # Workers inherit the environment, so they all snapshot their metrics into the same directory.
+    if env("METRICS_MULTIPROC_DIR"):
+        import metrics
+        os.makedirs(os.environ["METRICS_MULTIPROC_DIR"], exist_ok=True)
+        metrics.clear_shared_dir(os.environ["METRICS_MULTIPROC_DIR"])
+    else:
+        os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="ai-service-metrics-")
+    AIServiceApplication(options_from(args)).run()
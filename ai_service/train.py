@@ -1,96 +1,232 @@
+import argparse
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-import joblib
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from bson import ObjectId
 from pymongo import MongoClient
 from dotenv import dotenv_values
+from datetime import datetime, timezone
 import os
+import tempfile
+import time
+import model_registry
 
 # --- Configuration ---
 # Load environment variables from the .env file in the Node.js project directory
 # This allows us to get the MONGO_URI without hardcoding it.
 config = dotenv_values(os.path.join(os.path.dirname(__file__), '..', 'hotel-management-app', '.env'))
-MONGO_URI = config.get('MONGO_URI')
+MONGO_URI = os.environ.get('MONGO_URI') or config.get('MONGO_URI')
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR') or os.path.join(SERVICE_DIR, 'models')
+CHECKPOINT_PATH = os.environ.get('TRAINING_CHECKPOINT') or os.path.join(SERVICE_DIR, 'training_state.npz')
 
-def train_model():
+# Daily aggregates are indexed by days since ORIGIN; room types follow the Room schema enum.
+ORIGIN = np.datetime64('2000-01-01', 'D')
+ROOM_TYPES = ['Single', 'Double', 'Suite', 'Other']
+AGGREGATES = ('bookings', 'lead_days', 'stay_nights')
+
+
+class TrainingState:
+    """Per-room-type, per-day booking aggregates plus the _id watermark of the last processed booking."""
+
+    def __init__(self, watermark=None, arrays=None):
+        self.watermark = watermark
+        self.arrays = arrays or {name: np.zeros((len(ROOM_TYPES), 0), dtype=np.int64) for name in AGGREGATES}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            if list(data['room_types']) != ROOM_TYPES:
+                print("Checkpoint room types changed; starting from scratch.")
+                return cls()
+            watermark = str(data['watermark'])
+            return cls(ObjectId(watermark) if watermark else None, {name: data[name] for name in AGGREGATES})
+
+    def save(self, path):
+        # Write-then-rename so an interrupted run never leaves a torn checkpoint behind.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, watermark=np.array(str(self.watermark or '')), room_types=np.array(ROOM_TYPES), **self.arrays)
+        os.replace(tmp_path, path)
+
+    @property
+    def n_days(self):
+        return self.arrays['bookings'].shape[1]
+
+    def add_batch(self, type_idx, booked_day, lead_days, stay_nights):
+        """Vectorized accumulation of one batch into the daily aggregates."""
+        if booked_day.size == 0:
+            return
+        needed = int(booked_day.max()) + 1
+        if needed > self.n_days:
+            grow = max(needed, self.n_days + 366) - self.n_days
+            for name in AGGREGATES:
+                self.arrays[name] = np.pad(self.arrays[name], ((0, 0), (0, grow)))
+        np.add.at(self.arrays['bookings'], (type_idx, booked_day), 1)
+        np.add.at(self.arrays['lead_days'], (type_idx, booked_day), lead_days)
+        np.add.at(self.arrays['stay_nights'], (type_idx, booked_day), stay_nights)
+
+    def monthly(self, until_month):
+        """(months, {aggregate: array[type, month]}) for every calendar month before until_month."""
+        days = ORIGIN + np.arange(self.n_days)
+        month_of_day = days.astype('datetime64[M]')
+        keep = month_of_day < until_month
+        if not keep.any() or not self.arrays['bookings'][:, keep].any():
+            return np.array([], dtype='datetime64[M]'), {}
+        active_days = np.flatnonzero(self.arrays['bookings'].sum(axis=0)[keep])
+        first_month = month_of_day[active_days[0]]
+        months = np.arange(first_month, until_month)
+        bucket = (month_of_day[keep] - first_month).astype(int)
+        valid = bucket >= 0
+        totals = {}
+        for name in AGGREGATES:
+            values = self.arrays[name][:, keep][:, valid]
+            totals[name] = np.stack([np.bincount(bucket[valid], weights=row, minlength=len(months)) for row in values])
+        return months, totals
+
+
+def _collect_batch(docs, type_of):
+    """Turns a list of booking documents into NumPy feature columns."""
+    docs = [d for d in docs if d.get('bookingDate') and d.get('checkInDate') and d.get('checkOutDate')]
+    if not docs:
+        return None
+    booked = np.array([d['bookingDate'] for d in docs], dtype='datetime64[ms]').astype('datetime64[D]')
+    check_in = np.array([d['checkInDate'] for d in docs], dtype='datetime64[ms]').astype('datetime64[D]')
+    check_out = np.array([d['checkOutDate'] for d in docs], dtype='datetime64[ms]').astype('datetime64[D]')
+    type_idx = np.fromiter((type_of.get(d.get('room'), len(ROOM_TYPES) - 1) for d in docs), dtype=np.int64, count=len(docs))
+    booked_day = (booked - ORIGIN).astype(np.int64)
+    in_range = booked_day >= 0
+    return (type_idx[in_range], booked_day[in_range],
+            np.maximum((check_in - booked).astype(np.int64), 0)[in_range],
+            np.maximum((check_out - check_in).astype(np.int64), 0)[in_range])
+
+
+def _seasonal_model():
+    """Month-of-year seasonal model; still takes the `month_number` column the AI service sends."""
+    return Pipeline([
+        ('month', ColumnTransformer([('onehot', OneHotEncoder(categories=[list(range(1, 13))], handle_unknown='ignore'), ['month_number'])])),
+        ('regressor', Ridge(alpha=1.0)),
+    ])
+
+
+def train_model(full=False, batch_size=5000):
     """
-    Connects to MongoDB, fetches real booking data, trains a prediction model,
-    and saves it to a file.
+    Streams bookings newer than the checkpoint watermark from MongoDB, folds them
+    into per-day aggregates, fits seasonal models and publishes the result.
     """
     if not MONGO_URI:
         print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
         return
 
     print("--- Starting AI Model Training ---")
+    started = time.perf_counter()
     print("Connecting to MongoDB...")
     try:
         client = MongoClient(MONGO_URI)
         db = client.get_database() # The DB name is part of the URI
         bookings_collection = db.bookings
+        rooms_collection = db.rooms
         print("Connection successful.")
     except Exception as e:
         print(f"ERROR: Could not connect to MongoDB. {e}")
         return
 
-    # --- 1. Fetch and Aggregate Data from MongoDB ---
-    print("Fetching and aggregating booking data...")
-    pipeline = [
-        {
-            "$group": {
-                "_id": { "$month": "$bookingDate" }, # Group documents by the month of their bookingDate
-                "count": { "$sum": 1 }              # Count the number of bookings in each group
-            }
-        },
-        {
-            "$sort": { "_id": 1 } # Sort by month (1-12)
-        }
-    ]
-
+    # --- 1. Stream New Bookings Into the Checkpoint ---
+    state = TrainingState() if full else TrainingState.load(CHECKPOINT_PATH)
+    print(f"Resuming after booking {state.watermark}." if state.watermark else "No checkpoint; processing all bookings.")
     try:
-        monthly_bookings = list(bookings_collection.aggregate(pipeline))
-        if not monthly_bookings:
-            print("WARNING: No booking data found in the database. Cannot train model.")
-            client.close()
-            return
-            
-        print(f"Found data for {len(monthly_bookings)} months.")
-        print(monthly_bookings) # Optional: to see the fetched data
+        type_of = {r['_id']: ROOM_TYPES.index(r['type']) if r.get('type') in ROOM_TYPES else len(ROOM_TYPES) - 1
+                   for r in rooms_collection.find({}, {'type': 1})}
+        query = {'_id': {'$gt': state.watermark}} if state.watermark else {}
+        cursor = bookings_collection.find(query, {'room': 1, 'bookingDate': 1, 'checkInDate': 1, 'checkOutDate': 1}) \
+            .sort('_id', 1).batch_size(batch_size)
 
+        processed, batch = 0, []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                processed += _fold_batch(state, batch, type_of)
+                batch = []
+        processed += _fold_batch(state, batch, type_of)
+        print(f"Processed {processed} new bookings.")
     except Exception as e:
-        print(f"ERROR: Failed to aggregate data. {e}")
+        print(f"ERROR: Failed to stream booking data. {e}")
         client.close()
         return
+    client.close()
+    state.save(CHECKPOINT_PATH)
 
-    # --- 2. Prepare Data for Scikit-learn ---
+    # --- 2. Prepare Monthly Training Data ---
     print("Preparing data for training...")
-    # Create a DataFrame with all 12 months, initialized to 0 bookings
-    df = pd.DataFrame({'month_number': range(1, 13), 'total_bookings': [0] * 12})
-    df.set_index('month_number', inplace=True)
-
-    # Fill the DataFrame with the actual counts from the database
-    for month_data in monthly_bookings:
-        month_number = month_data['_id']
-        count = month_data['count']
-        df.loc[month_number, 'total_bookings'] = count
-
-    df.reset_index(inplace=True) # Reset index to get 'month_number' back as a column
-
-    X = df[['month_number']]      # Features (the month)
-    y = df['total_bookings']      # Target (the number of bookings)
+    # The current month is still filling up, so only complete months are used.
+    current_month = np.datetime64(datetime.now(timezone.utc).strftime('%Y-%m'), 'M')
+    months, totals = state.monthly(current_month)
+    if len(months) == 0:
+        print("WARNING: No booking data found in the database. Cannot train model.")
+        return
+    month_number = (months.astype(int) % 12) + 1
+    X = pd.DataFrame({'month_number': month_number})
+    per_type = totals['bookings']
+    y = per_type.sum(axis=0)
+    print(f"Training on {len(months)} months of history ({int(y.sum())} bookings).")
 
-    # --- 3. Train the Linear Regression Model ---
+    # --- 3. Train the Seasonal Models ---
     print("Training the model...")
-    model = LinearRegression()
-    model.fit(X, y)
+    model = _seasonal_model().fit(X, y)
+    predictions = model.predict(X)
+    month_grid = pd.DataFrame({'month_number': range(1, 13)})
+    by_room_type = {}
+    for t, room_type in enumerate(ROOM_TYPES):
+        if not per_type[t].any():
+            continue
+        bookings = per_type[t]
+        seasonal = _seasonal_model().fit(X, bookings)
+        by_room_type[room_type] = {
+            "monthly_forecast": [round(float(v), 3) for v in seasonal.predict(month_grid)],
+            "avg_lead_days": round(float(totals['lead_days'][t].sum() / bookings.sum()), 2),
+            "avg_stay_nights": round(float(totals['stay_nights'][t].sum() / bookings.sum()), 2),
+        }
     print("Model training completed successfully.")
 
-    # --- 4. Save the Trained Model ---
-    model_filename = 'booking_model.pkl'
-    joblib.dump(model, model_filename)
-    print(f"Model saved to '{model_filename}'.")
-
-    # Close the database connection
-    client.close()
+    # --- 4. Publish the Trained Model ---
+    # The running AI service picks up the new version from the registry without a restart.
+    metadata = {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "row_count": int(y.sum()),
+        "months_of_history": int(len(months)),
+        "history_start": str(months[0]),
+        "history_end": str(months[-1]),
+        "average_monthly_bookings": round(float(y.mean()), 3),
+        "features": list(X.columns),
+        "model": "seasonal one-hot month + ridge",
+        "metrics": {"r2": float(r2_score(y, predictions)), "mae": float(mean_absolute_error(y, predictions))},
+        "by_room_type": by_room_type,
+        "training_seconds": round(time.perf_counter() - started, 3),
+    }
+    version = model_registry.publish(model, metadata, REGISTRY_DIR, legacy_path=os.path.join(SERVICE_DIR, 'booking_model.pkl'))
+    print(f"Model published as version '{version}' in '{REGISTRY_DIR}'.")
     print("--- Training Process Finished ---")
 
+
+def _fold_batch(state, batch, type_of):
+    if not batch:
+        return 0
+    columns = _collect_batch(batch, type_of)
+    if columns is not None:
+        state.add_batch(*columns)
+    state.watermark = batch[-1]['_id']
+    return len(batch)
+
+
 if __name__ == '__main__':
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and publish the booking demand model.")
+    parser.add_argument('--full', action='store_true', help="Ignore the checkpoint and reprocess every booking.")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Bookings fetched and aggregated per batch.")
+    args = parser.parse_args()
+    train_model(full=args.full, batch_size=args.batch_size)
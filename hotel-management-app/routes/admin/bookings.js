@@ -53,15 +53,12 @@ router.post('/', async (req, res) => {
         }
 
         // --- Step 2: Call the Python AI service to pick the best room ---
-        // We also send all rooms to give the AI context about the hotel layout and occupancy.
-        const allRooms = await Room.find({}).lean();
-        
+        // The AI service keeps its own room table for layout and occupancy, so only ids are sent.
         let bestRoomId;
         try {
             console.log('Calling AI Smart Assign service...');
             const aiResponse = await axios.post('http://localhost:5000/smart-assign', {
-                available_rooms: availableRooms,
-                all_rooms: allRooms
+                available_room_ids: availableRooms.map(r => r._id)
             });
             bestRoomId = aiResponse.data.best_room_id;
         } catch (aiError) {
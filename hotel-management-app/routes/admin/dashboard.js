@@ -34,26 +34,16 @@ router.get('/', async (req, res) => {
         let priceSuggestion = { suggestion_percent: 0, reason: 'AI service unavailable.' };
         
         try {
-            // Prepare data for the AI service
+            // Prepare data for the AI service; next month's active bookings come from its occupancy calendar
             const nextMonthDate = new Date();
             nextMonthDate.setMonth(nextMonthDate.getMonth() + 1);
             const month_to_predict = nextMonthDate.getMonth() + 1;
             const year = nextMonthDate.getFullYear();
-            const startOfNextMonth = new Date(year, month_to_predict - 1, 1);
-            const endOfNextMonth = new Date(year, month_to_predict, 0, 23, 59, 59);
-            const active_bookings_next_month = await Booking.countDocuments({
-                status: 'Active',
-                $or: [
-                    { checkInDate: { $lte: endOfNextMonth, $gte: startOfNextMonth } },
-                    { checkOutDate: { $gte: startOfNextMonth, $lte: endOfNextMonth } },
-                    { checkInDate: { $lt: startOfNextMonth }, checkOutDate: { $gt: endOfNextMonth } }
-                ]
-            });
 
             // Make the single API call
             const aiResponse = await axios.post('http://localhost:5000/dashboard-stats', {
                 month_to_predict,
-                active_bookings_next_month,
+                year,
                 total_rooms: totalRooms
             });
             
@@ -7,7 +7,7 @@ const Room = require('../models/Room');     // Import Room model
 
 // Proxy for the AI Concierge
 router.post('/chat', async (req, res) => {
-    const { message, history } = req.body; // <-- NEW: Get history from request
+    const { message, session_id, history } = req.body; // The AI service keeps history per session_id
 
     if (!message) {
         return res.status(400).json({ error: 'Message is required.' });
@@ -16,7 +16,8 @@ router.post('/chat', async (req, res) => {
     try {
         const aiResponse = await axios.post('http://localhost:5000/chat', {
             message,
-            history: history || [], // <-- NEW: Pass history to Python
+            session_id,
+            history, // Recent turns; seed a new session when session_id is unknown to the AI worker
             token: process.env.GITHUB_TOKEN
         });
 
@@ -47,6 +48,21 @@ router.post('/log-chat', async (req, res) => {
     }
 });
 
+// Batched variant used by the Python service's background log shipper
+router.post('/log-chat/batch', async (req, res) => {
+    try {
+        const logs = (req.body.logs || []).filter(l => l.userInput && l.aiResponse);
+        if (logs.length === 0) {
+            return res.status(400).json({ error: 'At least one log with user input and AI response is required.' });
+        }
+        await ChatLog.insertMany(logs, { ordered: false });
+        res.status(201).json({ success: true, count: logs.length });
+    } catch (error) {
+        console.error('Error logging chat batch:', error);
+        res.status(500).json({ success: false, message: 'Failed to log chat batch.' });
+    }
+});
+
 // NEW: Endpoint to get demand level for frontend visualization
 router.get('/demand-level', async (req, res) => {
     try {
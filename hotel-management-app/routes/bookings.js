@@ -46,9 +46,6 @@ router.post('/', ensureAuth, async (req, res) => {
 
         let aiRecommendedRoomId = null;
         try {
-            const allRoomsForContext = await Room.find({}).lean();
-            const simpleAllRooms = allRoomsForContext.map(r => ({ roomNumber: r.roomNumber, isAvailable: !occupiedRoomIds.has(r._id.toString()) }));
-
             // Pass user preferences to the AI service
             const userPreferences = {
                 preferredFloor: req.user.preferredFloor,
@@ -56,9 +53,11 @@ router.post('/', ensureAuth, async (req, res) => {
                 interests: req.user.interests
             };
 
+            // The AI service keeps its own room table and booking index, so ids and dates are enough.
             const aiResponse = await axios.post('http://localhost:5000/smart-assign', {
-                available_rooms: availableRooms,
-                all_rooms: simpleAllRooms,
+                available_room_ids: availableRooms.map(r => r._id),
+                check_in: checkIn,
+                check_out: checkOut,
                 user_preferences: userPreferences // NEW: Pass user preferences
             });
             aiRecommendedRoomId = aiResponse.data.best_room_id;